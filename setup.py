@@ -0,0 +1,34 @@
+"""
+可选的Cython编译入口
+
+项目元数据均在 pyproject.toml 中声明，本文件只负责可选的C扩展：
+设置环境变量 INVOICE_OCR_MCP_CYTHONIZE=true 后，构建时用Cython将发票解析器
+编译为扩展模块，与同名 .py 模块并存，导入时优先加载扩展；
+未设置该变量时构建纯Python包，行为与接口完全一致。
+
+Cython不在默认构建依赖中（在 pyproject.toml 中列为 cython 额外依赖），
+编译前需先安装并关闭构建隔离：
+
+    pip install "Cython>=3.0"
+    INVOICE_OCR_MCP_CYTHONIZE=true pip install --no-build-isolation .
+"""
+
+import os
+
+from setuptools import setup
+
+# 需要编译的热点模块（纯Python源码直接交给Cython编译，无需维护单独的 .pyx）
+CYTHON_MODULES = [
+    "src/invoice_ocr_mcp/modules/invoice_parser.py",
+]
+
+ext_modules = []
+if os.getenv("INVOICE_OCR_MCP_CYTHONIZE", "false").lower() == "true":
+    from Cython.Build import cythonize
+
+    ext_modules = cythonize(
+        CYTHON_MODULES,
+        compiler_directives={"language_level": "3"},
+    )
+
+setup(ext_modules=ext_modules)
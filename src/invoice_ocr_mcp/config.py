@@ -23,6 +23,8 @@ class OCREngineConfig:
     # RapidOCR配置
     rapidocr_use_gpu: bool = False
     rapidocr_device_id: int = 0
+    # 纯CPU推理时改用进程池并行执行推理（GPU推理始终使用线程池）
+    rapidocr_process_pool: bool = False
     
     # ModelScope配置（仅当engine_type='modelscope'时生效）
     modelscope_use_gpu: bool = False
@@ -41,6 +43,10 @@ class ModelConfig:
     # 信息抽取模型 - 使用通用文本分类模型或设置为None启用mock模式
     info_extraction_model: str = None  # 暂时设为None，启用mock模式
     cache_dir: str = "./cache/modelscope"
+    # 同时进行的模型下载数量
+    max_parallel_downloads: int = 4
+    # 单个模型内并发下载的文件数
+    download_file_workers: int = 8
     use_gpu: bool = False
     gpu_device_id: int = 0
     # 启用mock模式 - 当某些模型不可用时使用模拟数据
@@ -65,8 +71,14 @@ class ProcessingConfig:
     max_image_size: int = 4096
     model_inference_timeout: int = 30
     parallel_workers: int = 4
+    # 文本识别每次前向推理处理的文本行数量
+    recognition_batch_size: int = 16
+    # 送入文本检测前图像长边的上限（像素），超出时等比缩小
+    ocr_max_side_len: int = 1600
     enable_cache: bool = True
     cache_expire_time: int = 86400
+    # 服务端识别结果缓存的最大条目数（按图像内容去重，LRU淘汰）
+    result_cache_size: int = 256
 
 
 @dataclass
@@ -197,6 +209,10 @@ class Config:
         # if not self.modelscope_api_token:
         #     logging.warning("未设置MODELSCOPE_API_TOKEN环境变量")
         
+        # OCR引擎配置
+        if os.getenv("RAPIDOCR_PROCESS_POOL"):
+            self.ocr_engine.rapidocr_process_pool = os.getenv("RAPIDOCR_PROCESS_POOL").lower() == "true"
+        
         # 模型配置
         if os.getenv("TEXT_DETECTION_MODEL"):
             self.models.text_detection_model = os.getenv("TEXT_DETECTION_MODEL")
@@ -206,6 +222,10 @@ class Config:
             self.models.invoice_classification_model = os.getenv("INVOICE_CLASSIFICATION_MODEL")
         if os.getenv("MODELSCOPE_CACHE_DIR"):
             self.models.cache_dir = os.getenv("MODELSCOPE_CACHE_DIR")
+        if os.getenv("MAX_PARALLEL_DOWNLOADS"):
+            self.models.max_parallel_downloads = int(os.getenv("MAX_PARALLEL_DOWNLOADS"))
+        if os.getenv("MODEL_DOWNLOAD_FILE_WORKERS"):
+            self.models.download_file_workers = int(os.getenv("MODEL_DOWNLOAD_FILE_WORKERS"))
         if os.getenv("USE_GPU"):
             self.models.use_gpu = os.getenv("USE_GPU").lower() == "true"
         if os.getenv("CUDA_DEVICE_ID"):
@@ -228,10 +248,16 @@ class Config:
             self.processing.max_batch_size = int(os.getenv("MAX_BATCH_SIZE"))
         if os.getenv("MAX_IMAGE_SIZE"):
             self.processing.max_image_size = int(os.getenv("MAX_IMAGE_SIZE"))
+        if os.getenv("RECOGNITION_BATCH_SIZE"):
+            self.processing.recognition_batch_size = int(os.getenv("RECOGNITION_BATCH_SIZE"))
+        if os.getenv("OCR_MAX_SIDE_LEN"):
+            self.processing.ocr_max_side_len = int(os.getenv("OCR_MAX_SIDE_LEN"))
         if os.getenv("ENABLE_CACHE"):
             self.processing.enable_cache = os.getenv("ENABLE_CACHE").lower() == "true"
         if os.getenv("CACHE_EXPIRE_TIME"):
             self.processing.cache_expire_time = int(os.getenv("CACHE_EXPIRE_TIME"))
+        if os.getenv("RESULT_CACHE_SIZE"):
+            self.processing.result_cache_size = int(os.getenv("RESULT_CACHE_SIZE"))
         
         # 安全配置
         if os.getenv("API_KEY"):
@@ -329,6 +355,8 @@ class Config:
                 "invoice_classification_model": self.models.invoice_classification_model,
                 "info_extraction_model": self.models.info_extraction_model,
                 "cache_dir": self.models.cache_dir,
+                "max_parallel_downloads": self.models.max_parallel_downloads,
+                "download_file_workers": self.models.download_file_workers,
                 "use_gpu": self.models.use_gpu,
                 "gpu_device_id": self.models.gpu_device_id,
             },
@@ -345,8 +373,11 @@ class Config:
                 "max_image_size": self.processing.max_image_size,
                 "model_inference_timeout": self.processing.model_inference_timeout,
                 "parallel_workers": self.processing.parallel_workers,
+                "recognition_batch_size": self.processing.recognition_batch_size,
+                "ocr_max_side_len": self.processing.ocr_max_side_len,
                 "enable_cache": self.processing.enable_cache,
                 "cache_expire_time": self.processing.cache_expire_time,
+                "result_cache_size": self.processing.result_cache_size,
             },
             "security": {
                 "cors_origins": self.security.cors_origins,
@@ -474,6 +474,12 @@ class BatchProcessor:
         if hasattr(self.ocr_engine, 'cleanup'):
             await self.ocr_engine.cleanup()
         
+        # 清理图像处理器
+        await self.image_processor.cleanup()
+        
+        # 清理发票解析器
+        await self.invoice_parser.cleanup()
+        
         # 清理批次记录
         self.active_batches.clear()
         
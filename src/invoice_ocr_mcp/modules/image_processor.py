@@ -8,15 +8,23 @@ import asyncio
 import base64
 import io
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 import numpy as np
 import cv2
-from PIL import Image, ImageEnhance, ExifTags
+from PIL import Image
 import aiohttp
 import aiofiles
 
 from ..config import Config
 
+# EXIF方向标签ID (Orientation)
+EXIF_ORIENTATION_TAG = 0x0112
+
+# 与PIL ImageFilter.SMOOTH一致的平滑卷积核（用于锐化）
+SMOOTH_KERNEL = np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], dtype=np.float32) / 13
+
 
 class ImageProcessor:
     """图像处理器"""
@@ -41,6 +49,19 @@ class ImageProcessor:
             'color': 1.0            # 色彩饱和度
         }
         
+        # 图像质量判定阈值（用于跳过不必要的滤波）
+        self.quality_thresholds = {
+            'noise': 100,           # 拉普拉斯方差低于此值视为低噪声
+            'contrast': 60,         # 灰度标准差高于此值视为高对比度
+            'binary_levels': 16     # 采样灰度级少于此值视为近似二值图
+        }
+        
+        # 图像编解码专用线程池（不与默认执行器共享）
+        self._decode_pool = ThreadPoolExecutor(
+            max_workers=config.processing.parallel_workers,
+            thread_name_prefix='image-decode'
+        )
+        
         self.logger.info("图像处理器初始化完成")
     
     async def decode_base64_image(self, base64_data: str) -> np.ndarray:
@@ -53,25 +74,11 @@ class ImageProcessor:
             图像numpy数组
         """
         try:
-            # 移除Base64前缀（如果存在）
-            if ',' in base64_data:
-                base64_data = base64_data.split(',')[1]
-            
-            # 解码Base64
-            image_bytes = base64.b64decode(base64_data)
-            
-            # 转换为PIL图像
-            pil_image = Image.open(io.BytesIO(image_bytes))
-            
-            # 处理EXIF方向信息
-            pil_image = self._handle_exif_orientation(pil_image)
-            
-            # 转换为RGB格式
-            if pil_image.mode != 'RGB':
-                pil_image = pil_image.convert('RGB')
-            
-            # 转换为numpy数组
-            image_array = np.array(pil_image)
+            # Base64与图像解码都是CPU密集操作，放到解码线程池执行，避免阻塞事件循环
+            loop = asyncio.get_running_loop()
+            image_array = await loop.run_in_executor(
+                self._decode_pool, self._decode_base64_sync, base64_data
+            )
             
             self.logger.debug(f"成功解码Base64图像，尺寸: {image_array.shape}")
             return image_array
@@ -80,6 +87,21 @@ class ImageProcessor:
             self.logger.error(f"Base64图像解码失败: {str(e)}")
             raise ValueError(f"无效的Base64图像数据: {str(e)}")
     
+    def _decode_base64_sync(self, base64_data: str) -> np.ndarray:
+        """同步执行Base64解码、图像解码与EXIF方向校正"""
+        # 移除Base64前缀（如果存在）
+        if ',' in base64_data:
+            base64_data = base64_data.split(',')[1]
+        
+        # 解码Base64
+        image_bytes = base64.b64decode(base64_data)
+        
+        # 转换为PIL图像
+        pil_image = Image.open(io.BytesIO(image_bytes))
+        
+        # 转换为numpy数组（含EXIF方向校正）
+        return self._pil_to_array(pil_image)
+    
     async def download_image(self, image_url: str) -> np.ndarray:
         """从URL下载图像
         
@@ -113,15 +135,8 @@ class ImageProcessor:
             # 转换为PIL图像
             pil_image = Image.open(io.BytesIO(image_bytes))
             
-            # 处理EXIF方向信息
-            pil_image = self._handle_exif_orientation(pil_image)
-            
-            # 转换为RGB格式
-            if pil_image.mode != 'RGB':
-                pil_image = pil_image.convert('RGB')
-            
-            # 转换为numpy数组
-            image_array = np.array(pil_image)
+            # 转换为numpy数组（含EXIF方向校正）
+            image_array = self._pil_to_array(pil_image)
             
             self.logger.debug(f"成功下载图像，URL: {image_url}, 尺寸: {image_array.shape}")
             return image_array
@@ -140,28 +155,33 @@ class ImageProcessor:
             预处理后的图像
         """
         try:
-            self.logger.debug("开始图像预处理")
-            
-            # 1. 尺寸检查和调整
-            image = await self._resize_if_needed(image)
-            
-            # 2. 去噪处理
-            image = await self._denoise_image(image)
-            
-            # 3. 图像增强
-            image = await self._enhance_image(image)
-            
-            # 4. 文档图像特殊处理
-            image = await self._document_specific_processing(image)
-            
-            self.logger.debug("图像预处理完成")
-            return image
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._decode_pool, self._preprocess_sync, image)
             
         except Exception as e:
             self.logger.error(f"图像预处理失败: {str(e)}")
             raise
     
-    async def _resize_if_needed(self, image: np.ndarray) -> np.ndarray:
+    def _preprocess_sync(self, image: np.ndarray) -> np.ndarray:
+        """同步执行单张图像的完整预处理流程"""
+        self.logger.debug("开始图像预处理")
+        
+        # 1. 尺寸检查和调整
+        image = self._resize_if_needed(image)
+        
+        # 2. 去噪处理
+        image = self._denoise_image(image)
+        
+        # 3. 图像增强
+        image = self._enhance_image(image)
+        
+        # 4. 文档图像特殊处理
+        image = self._document_specific_processing(image)
+        
+        self.logger.debug("图像预处理完成")
+        return image
+    
+    def _resize_if_needed(self, image: np.ndarray) -> np.ndarray:
         """如果需要则调整图像尺寸"""
         height, width = image.shape[:2]
         max_size = self.config.processing.max_image_size
@@ -173,6 +193,10 @@ class ImageProcessor:
             new_width = int(width * scale)
             new_height = int(height * scale)
             
+            # 缩小倍数很大时，先用INTER_AREA快速缩至目标的2倍，再做LANCZOS4精细缩放
+            if max(height, width) / max_size > 4:
+                image = cv2.resize(image, (new_width * 2, new_height * 2), interpolation=cv2.INTER_AREA)
+            
             # 使用高质量插值进行缩放
             image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LANCZOS4)
             self.logger.debug(f"图像尺寸调整: {width}x{height} -> {new_width}x{new_height}")
@@ -183,38 +207,48 @@ class ImageProcessor:
         
         return image
     
-    async def _denoise_image(self, image: np.ndarray) -> np.ndarray:
+    def _denoise_image(self, image: np.ndarray) -> np.ndarray:
         """图像去噪处理"""
+        # 清晰、高对比度的扫描件无需去噪
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        noise = self._estimate_noise(gray)
+        contrast = float(np.std(gray[::4, ::4]))
+        if noise < self.quality_thresholds['noise'] and contrast > self.quality_thresholds['contrast']:
+            self.logger.debug(f"图像质量良好，跳过去噪 (噪声: {noise:.1f}, 对比度: {contrast:.1f})")
+            return image
+        
         # 使用非局部均值去噪
         denoised = cv2.fastNlMeansDenoisingColored(image, None, 10, 10, 7, 21)
         return denoised
     
-    async def _enhance_image(self, image: np.ndarray) -> np.ndarray:
-        """图像增强处理"""
-        # 转换为PIL图像进行增强
-        pil_image = Image.fromarray(image)
-        
-        # 亮度增强
-        if self.enhancement_params['brightness'] != 1.0:
-            enhancer = ImageEnhance.Brightness(pil_image)
-            pil_image = enhancer.enhance(self.enhancement_params['brightness'])
-        
-        # 对比度增强
-        if self.enhancement_params['contrast'] != 1.0:
-            enhancer = ImageEnhance.Contrast(pil_image)
-            pil_image = enhancer.enhance(self.enhancement_params['contrast'])
-        
-        # 锐化处理
-        if self.enhancement_params['sharpness'] != 1.0:
-            enhancer = ImageEnhance.Sharpness(pil_image)
-            pil_image = enhancer.enhance(self.enhancement_params['sharpness'])
-        
-        # 转换回numpy数组
-        enhanced_image = np.array(pil_image)
-        
-        return enhanced_image
+    def _enhance_image(self, image: np.ndarray) -> np.ndarray:
+        """图像增强处理
+        
+        亮度与对比度融合为一次线性变换，锐化为一次卷积，均直接在uint8上由OpenCV完成，
+        结果与PIL ImageEnhance近似一致（仅有取整误差），且无需PIL转换和浮点中间图像。
+        """
+        brightness = self.enhancement_params['brightness']
+        contrast = self.enhancement_params['contrast']
+        sharpness = self.enhancement_params['sharpness']
+        
+        enhanced = image
+        
+        # 亮度+对比度增强: out = contrast * (brightness * I) + (1 - contrast) * mean
+        if brightness != 1.0 or contrast != 1.0:
+            mean = cv2.mean(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY))[0] * brightness
+            alpha = brightness * contrast
+            beta = (1.0 - contrast) * mean
+            enhanced = cv2.addWeighted(enhanced, alpha, enhanced, 0, beta)
+        
+        # 锐化处理: out = sharpness * I + (1 - sharpness) * smooth(I)
+        if sharpness != 1.0:
+            kernel = (1.0 - sharpness) * SMOOTH_KERNEL
+            kernel[1, 1] += sharpness
+            enhanced = cv2.filter2D(enhanced, -1, kernel, borderType=cv2.BORDER_REPLICATE)
+        
+        return enhanced
     
-    async def _document_specific_processing(self, image: np.ndarray) -> np.ndarray:
+    def _document_specific_processing(self, image: np.ndarray) -> np.ndarray:
         """文档图像特殊处理"""
         # 转换为灰度图进行处理
         gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
@@ -234,11 +268,24 @@ class ImageProcessor:
         kernel = np.ones((2, 2), np.uint8)
         processed = cv2.morphologyEx(processed, cv2.MORPH_CLOSE, kernel)
         
-        # 3. 边缘保护的平滑处理
-        processed = cv2.bilateralFilter(processed, 9, 75, 75)
+        # 3. 边缘保护的平滑处理（近似二值图像无需平滑）
+        if self._is_binary_like(processed):
+            self.logger.debug("图像已近似二值化，跳过双边滤波")
+        else:
+            processed = cv2.bilateralFilter(processed, 9, 75, 75)
         
         return processed
     
+    def _estimate_noise(self, gray_image: np.ndarray) -> float:
+        """基于降采样图像的拉普拉斯方差估算噪声水平"""
+        sub = gray_image[::4, ::4]
+        return float(cv2.Laplacian(sub, cv2.CV_32F).var())
+    
+    def _is_binary_like(self, image: np.ndarray) -> bool:
+        """判断图像是否已近似二值化（采样像素的取值种类很少）"""
+        sub = image[::4, ::4]
+        return np.unique(sub).size < self.quality_thresholds['binary_levels']
+    
     def _needs_binarization(self, gray_image: np.ndarray) -> bool:
         """判断是否需要二值化处理"""
         # 计算图像的对比度
@@ -247,25 +294,36 @@ class ImageProcessor:
         # 如果对比度较低，可能需要二值化
         return std < 50
     
-    def _handle_exif_orientation(self, pil_image: Image.Image) -> Image.Image:
-        """处理EXIF方向信息"""
+    def _pil_to_array(self, pil_image: Image.Image) -> np.ndarray:
+        """将PIL图像转换为RGB numpy数组，并按EXIF方向信息校正"""
+        orientation = self._get_exif_orientation(pil_image)
+        
+        # 转换为RGB格式
+        if pil_image.mode != 'RGB':
+            pil_image = pil_image.convert('RGB')
+        
+        image_array = np.array(pil_image)
+        return self._handle_exif_orientation(image_array, orientation)
+    
+    def _get_exif_orientation(self, pil_image: Image.Image) -> Optional[int]:
+        """读取EXIF方向标签（直接按标签ID查找，无需遍历全部EXIF）"""
         try:
-            if hasattr(pil_image, '_getexif'):
-                exif = pil_image._getexif()
-                if exif is not None:
-                    for tag, value in exif.items():
-                        if tag in ExifTags.TAGS and ExifTags.TAGS[tag] == 'Orientation':
-                            if value == 3:
-                                pil_image = pil_image.rotate(180, expand=True)
-                            elif value == 6:
-                                pil_image = pil_image.rotate(270, expand=True)
-                            elif value == 8:
-                                pil_image = pil_image.rotate(90, expand=True)
-                            break
+            exif = pil_image.getexif()
+            return exif.get(EXIF_ORIENTATION_TAG) if exif else None
         except Exception as e:
-            self.logger.warning(f"处理EXIF方向信息失败: {str(e)}")
+            self.logger.warning(f"读取EXIF方向信息失败: {str(e)}")
+            return None
+    
+    def _handle_exif_orientation(self, image: np.ndarray, orientation: Optional[int]) -> np.ndarray:
+        """处理EXIF方向信息（在numpy数组上使用cv2.rotate旋转）"""
+        if orientation == 3:
+            image = cv2.rotate(image, cv2.ROTATE_180)
+        elif orientation == 6:
+            image = cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+        elif orientation == 8:
+            image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
         
-        return pil_image
+        return image
     
     async def validate_image(self, image: Union[str, np.ndarray]) -> Tuple[bool, str]:
         """验证图像有效性
@@ -327,30 +385,19 @@ class ImageProcessor:
             Base64编码的图像字符串
         """
         try:
-            # 转换为PIL图像
-            pil_image = Image.fromarray(image)
-            
-            # 保存到内存缓冲区
-            buffer = io.BytesIO()
-            
             if format.upper() == 'JPEG':
-                pil_image.save(buffer, format='JPEG', quality=quality, optimize=True)
-                mime_type = 'image/jpeg'
+                ext, mime_type = '.jpg', 'image/jpeg'
             elif format.upper() == 'PNG':
-                pil_image.save(buffer, format='PNG', optimize=True)
-                mime_type = 'image/png'
+                ext, mime_type = '.png', 'image/png'
             else:
                 raise ValueError(f"不支持的图像格式: {format}")
             
-            # 编码为Base64
-            buffer.seek(0)
-            image_bytes = buffer.getvalue()
-            base64_string = base64.b64encode(image_bytes).decode('utf-8')
+            # 直接编码为内存缓冲区，并在其上进行Base64编码（无中间bytes拷贝）
+            buffer = self._encode_image(image, ext, quality)
+            base64_bytes = base64.b64encode(buffer)
             
             # 添加数据URI前缀
-            data_uri = f"data:{mime_type};base64,{base64_string}"
-            
-            return data_uri
+            return b''.join([b'data:', mime_type.encode(), b';base64,', base64_bytes]).decode('ascii')
             
         except Exception as e:
             self.logger.error(f"图像Base64转换失败: {str(e)}")
@@ -364,12 +411,14 @@ class ImageProcessor:
             file_path: 文件路径
         """
         try:
-            # 转换为PIL图像
-            pil_image = Image.fromarray(image)
+            # 在编解码线程池中编码，再异步写入文件
+            loop = asyncio.get_running_loop()
+            buffer = await loop.run_in_executor(
+                self._decode_pool, self._encode_image, image, Path(file_path).suffix
+            )
             
-            # 异步保存
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, pil_image.save, file_path)
+            async with aiofiles.open(file_path, 'wb') as f:
+                await f.write(buffer)
             
             self.logger.debug(f"图像保存成功: {file_path}")
             
@@ -391,18 +440,11 @@ class ImageProcessor:
             async with aiofiles.open(file_path, 'rb') as f:
                 image_bytes = await f.read()
             
-            # 转换为PIL图像
-            pil_image = Image.open(io.BytesIO(image_bytes))
-            
-            # 处理EXIF方向信息
-            pil_image = self._handle_exif_orientation(pil_image)
-            
-            # 转换为RGB格式
-            if pil_image.mode != 'RGB':
-                pil_image = pil_image.convert('RGB')
-            
-            # 转换为numpy数组
-            image_array = np.array(pil_image)
+            # 在编解码线程池中解码（cv2.imdecode会自动处理EXIF方向）
+            loop = asyncio.get_running_loop()
+            image_array = await loop.run_in_executor(
+                self._decode_pool, self._decode_image_bytes, image_bytes
+            )
             
             self.logger.debug(f"图像加载成功: {file_path}, 尺寸: {image_array.shape}")
             return image_array
@@ -411,6 +453,37 @@ class ImageProcessor:
             self.logger.error(f"图像加载失败: {file_path}, 错误: {str(e)}")
             raise
     
+    def _encode_image(self, image: np.ndarray, ext: str, quality: int = 95) -> np.ndarray:
+        """使用cv2.imencode将RGB图像编码为指定格式的一维uint8缓冲区"""
+        if image.ndim == 3 and image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        elif image.ndim == 3 and image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_RGBA2BGRA)
+        
+        params = []
+        if ext.lower() in ('.jpg', '.jpeg'):
+            params = [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+        
+        success, buffer = cv2.imencode(ext, image, params)
+        if not success:
+            raise ValueError(f"图像编码失败: {ext}")
+        
+        return buffer
+    
+    def _decode_image_bytes(self, image_bytes: bytes) -> np.ndarray:
+        """使用cv2.imdecode将字节数据解码为RGB图像数组
+        
+        OpenCV不支持的格式（如部分构建中的GIF）回退到PIL解码
+        """
+        image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            try:
+                return self._pil_to_array(Image.open(io.BytesIO(image_bytes)))
+            except Exception as e:
+                raise ValueError(f"无法解码图像数据: {str(e)}")
+        
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    
     async def get_image_info(self, image: np.ndarray) -> Dict[str, Any]:
         """获取图像信息
         
@@ -465,4 +538,9 @@ class ImageProcessor:
             
         except Exception as e:
             self.logger.error(f"缩略图创建失败: {str(e)}")
-            raise 
\ No newline at end of file
+            raise 
+    
+    async def cleanup(self) -> None:
+        """清理资源"""
+        self._decode_pool.shutdown(wait=True)
+        self.logger.info("图像处理器资源清理完成")
@@ -4,18 +4,80 @@
 将OCR识别结果解析为结构化的发票信息
 """
 
+import os
 import re
+import sys
+import copy
+import asyncio
+import bisect
+import hashlib
 import logging
+import threading
+from types import MappingProxyType
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import json
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
 from ..config import Config
 
 
+# 自由线程构建（PEP 703，GIL已关闭）下线程可以真正并行执行解析
+GIL_DISABLED = not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+# Executor.shutdown的cancel_futures参数自Python 3.9起才支持
+_SHUTDOWN_KWARGS = {"cancel_futures": True} if sys.version_info >= (3, 9) else {}
+
+# 进程池工作进程内的解析器实例（每个进程初始化一次）
+_worker_parser: Optional["InvoiceParser"] = None
+
+
+def _init_parse_worker(config: Config) -> None:
+    """进程池工作进程初始化：创建本进程的解析器实例"""
+    global _worker_parser
+    _worker_parser = InvoiceParser(config)
+
+
+def _parse_in_worker(ocr_result: Dict[str, Any], output_format: str) -> Dict[str, Any]:
+    """在工作进程中同步解析单张发票"""
+    return _worker_parser.parse_invoice_sync(ocr_result, output_format)
+
+
 class InvoiceParser:
     """发票信息解析器"""
     
+    # 结果字典模板（只读），各解析方法以 .copy() 起步，避免每次重建字面量
+    _EMPTY_BASIC_INFO = MappingProxyType({
+        "invoice_number": None,
+        "invoice_date": None,
+        "total_amount": None,
+        "tax_amount": None,
+        "amount_without_tax": None
+    })
+    _EMPTY_PARTY_INFO = MappingProxyType({
+        "name": None,
+        "tax_id": None,
+        "address": None,
+        "phone": None,
+        "bank_account": None
+    })
+    _EMPTY_DOCUMENT_FIELDS = MappingProxyType({
+        "invoice_date": None,
+        "check_code": None,
+        "machine_number": None
+    })
+    
     def __init__(self, config: Config):
         """初始化发票解析器
         
@@ -42,6 +104,55 @@ class InvoiceParser:
             "100": "区块链发票（支持深圳、北京和云南地区）"
         }
         
+        # 文本数量置信度分档：数量 <=5 / <=10 / <=20 / >20
+        self.text_count_bounds = [5, 10, 20]
+        self.text_count_confidences = [0.3, 0.5, 0.7, 0.9]
+        
+        # 区域划分规则：start关键词开启区域，end关键词结束区域
+        self.section_rules = {
+            "seller": {
+                "start": ["销售方", "开票方", "出售方"],
+                "end": ["购买方", "收票方", "商品"],
+                "include_start": True
+            },
+            "buyer": {
+                "start": ["购买方", "收票方", "购方"],
+                "end": ["商品", "合计", "税额"],
+                "include_start": True
+            },
+            "items": {
+                "start": ["商品名称", "货物", "商品", "明细"],
+                "end": ["合计", "总计"],
+                "include_start": False
+            }
+        }
+        
+        # 解析结果LRU缓存（OCR文本+分类结果哈希 -> 标准格式结果）
+        self._result_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._result_cache_size = 1024
+        self._result_cache_lock = threading.Lock()
+        
+        # 批量解析用执行器（首次调用parse_batch时创建）
+        self._batch_executor: Optional[Executor] = None
+        
+        # 详细输出格式中的识别标记及其关键词
+        self.detail_keywords = {
+            "has_invoice_number": ["发票号码"],
+            "has_seller_info": ["销售方"],
+            "has_buyer_info": ["购买方"],
+            "has_amount_info": ["合计", "金额"]
+        }
+        
+        # 金额类别关键词（按优先级依次判断）
+        self.amount_keywords = {
+            "total": ["合计", "总计", "价税合计"],
+            "tax": ["税额"],
+            "without_tax": ["不含税", "金额"]
+        }
+        
+        # 发票号码所在行的关键词
+        self.invoice_number_keywords = ["号码"]
+        
         # 正则表达式模式
         self._compile_patterns()
         
@@ -49,6 +160,18 @@ class InvoiceParser:
     
     def _compile_patterns(self) -> None:
         """编译正则表达式模式"""
+        # 发票类型名称：按长度降序组成交替正则，同一位置优先匹配最长的名称
+        type_names = sorted(self.invoice_types.values(), key=len, reverse=True)
+        self._type_regex = re.compile('|'.join(re.escape(name) for name in type_names))
+        self._name_to_code = {name: code for code, name in self.invoice_types.items()}
+        
+        # 倒排映射：类型名称的任意子串 -> 首个包含该子串的类型代码
+        self._type_substring_to_code: Dict[str, str] = {}
+        for code, name in self.invoice_types.items():
+            for start in range(len(name)):
+                for end in range(start + 1, len(name) + 1):
+                    self._type_substring_to_code.setdefault(name[start:end], code)
+        
         # 发票号码模式
         self.invoice_number_pattern = re.compile(r'[0-9]{8,12}')
         
@@ -60,11 +183,8 @@ class InvoiceParser:
             re.compile(r'(\d{4})/(\d{2})/(\d{2})'),
         ]
         
-        # 金额模式
-        self.amount_patterns = [
-            re.compile(r'[￥¥]?\s*(\d+(?:,\d{3})*(?:\.\d{2})?)\s*元?'),
-            re.compile(r'(\d+(?:,\d{3})*(?:\.\d{2})?)'),
-        ]
+        # 金额模式（分组只含数字、千分位逗号和两位小数，去掉逗号后必为有效数字）
+        self.amount_pattern = re.compile(r'[￥¥]?\s*(\d+(?:,\d{3})*(?:\.\d{2})?)')
         
         # 税号模式（18位统一社会信用代码或15位纳税人识别号）
         self.tax_id_patterns = [
@@ -77,10 +197,148 @@ class InvoiceParser:
         
         # 银行账号模式
         self.bank_account_pattern = re.compile(r'\d{16,21}')
+        
+        # 地址模式：以空白分隔、长度大于5且含地址关键词的完整文本段
+        self.address_keywords = '市区县路街号室楼'
+        self.address_pattern = re.compile(
+            r'(?<!\S)(?=\S*[' + self.address_keywords + r'])\S{6,}'
+        )
+        self._address_keyword_rank = {keyword: rank for rank, keyword in enumerate(self.address_keywords)}
+        
+        # 校验码（通常是8-12位数字）和机器编号（通常是12位数字）模式
+        check_code_expression = r'校验码[：:]?\s*(?P<check_code>[0-9]{8,12})'
+        machine_number_expression = r'机器编号[：:]?\s*(?P<machine_number>[0-9]{12})'
+        self.check_code_pattern = re.compile(check_code_expression)
+        self.machine_number_pattern = re.compile(machine_number_expression)
+        
+        # 整张发票级字段（日期、校验码、机器编号）的融合模式，对合并文本只扫描一次
+        document_field_expressions = [
+            r'(?P<date>(?P<year>\d{4})[年\-/](?P<month>\d{1,2})[月\-/](?P<day>\d{1,2})日?)',
+            check_code_expression,
+            machine_number_expression,
+        ]
+        self.document_field_pattern = re.compile('|'.join(document_field_expressions))
+        
+        # Hyperscan多模式数据库：线性时间定位首个候选字段的起始位置（未安装时为None）
+        # 短文本上回调开销高于re回溯，只对不短于阈值的文本启用
+        self._document_field_db = None
+        self._hyperscan_min_length = 512
+        self._hyperscan_local = threading.local()
+        if hyperscan is not None:
+            try:
+                # Hyperscan不支持命名分组，去掉组名后逐条编译
+                hs_expressions = [
+                    re.sub(r'\(\?P<\w+>', '(', expression).encode('utf-8')
+                    for expression in document_field_expressions
+                ]
+                hs_flags = hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SOM_LEFTMOST
+                self._document_field_db = hyperscan.Database()
+                self._document_field_db.compile(
+                    expressions=hs_expressions,
+                    ids=list(range(len(hs_expressions))),
+                    elements=len(hs_expressions),
+                    flags=[hs_flags] * len(hs_expressions)
+                )
+            except hyperscan.error as e:
+                self.logger.warning(f"Hyperscan模式编译失败，使用re扫描: {str(e)}")
+                self._document_field_db = None
+        
+        # 关键词位掩码：每个关键词占一位，每行文本一次扫描得到整数掩码，
+        # 之后的"是否包含关键词X"都变成按位与
+        keyword_groups = [rule["start"] + rule["end"] for rule in self.section_rules.values()]
+        keyword_groups += list(self.detail_keywords.values())
+        keyword_groups += list(self.amount_keywords.values())
+        keyword_groups.append(self.invoice_number_keywords)
+        keywords = sorted({keyword for group in keyword_groups for keyword in group})
+        self._keyword_bits = {keyword: 1 << index for index, keyword in enumerate(keywords)}
+        
+        self._section_masks = {
+            name: (self._keywords_to_mask(rule["start"]), self._keywords_to_mask(rule["end"]))
+            for name, rule in self.section_rules.items()
+        }
+        self._detail_masks = {
+            flag: self._keywords_to_mask(group) for flag, group in self.detail_keywords.items()
+        }
+        self._amount_masks = [
+            (kind, self._keywords_to_mask(group)) for kind, group in self.amount_keywords.items()
+        ]
+        self._invoice_number_mask = self._keywords_to_mask(self.invoice_number_keywords)
+        
+        # 多模式匹配自动机（未安装pyahocorasick时退化为逐个子串查找）
+        self._keyword_automaton = None
+        if ahocorasick is not None:
+            self._keyword_automaton = ahocorasick.Automaton()
+            for keyword, bit in self._keyword_bits.items():
+                self._keyword_automaton.add_word(keyword, bit)
+            self._keyword_automaton.make_automaton()
     
     async def parse_invoice(self, ocr_result: Dict[str, Any], output_format: str = "standard") -> Dict[str, Any]:
         """解析发票信息
         
+        Args:
+            ocr_result: OCR识别结果
+            output_format: 输出格式 (standard/detailed/raw)
+            
+        Returns:
+            解析后的发票信息
+        """
+        return self.parse_invoice_sync(ocr_result, output_format)
+    
+    async def parse_batch(self, ocr_results: List[Dict[str, Any]],
+                          output_format: str = "standard") -> List[Dict[str, Any]]:
+        """批量解析发票信息，并行执行正则解析
+        
+        自由线程构建下在线程池中直接调用本实例（无序列化开销），
+        否则分发到进程池，每个工作进程持有自己的解析器实例
+        
+        Args:
+            ocr_results: OCR识别结果列表
+            output_format: 输出格式 (standard/detailed/raw)
+            
+        Returns:
+            解析结果列表，顺序与输入一致
+        """
+        # 单张发票不值得调度到执行器，直接在当前线程解析
+        if len(ocr_results) < 2:
+            return [self.parse_invoice_sync(r, output_format) for r in ocr_results]
+        
+        if self._batch_executor is None:
+            self._batch_executor = self._create_batch_executor()
+        
+        # 线程池共享本实例；进程池由工作进程内的解析器处理
+        if isinstance(self._batch_executor, ThreadPoolExecutor):
+            parse_func = self.parse_invoice_sync
+        else:
+            parse_func = _parse_in_worker
+        
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[
+            loop.run_in_executor(self._batch_executor, parse_func, ocr_result, output_format)
+            for ocr_result in ocr_results
+        ])
+    
+    def _create_batch_executor(self) -> Executor:
+        """根据解释器能力创建批量解析执行器
+        
+        Returns:
+            GIL关闭时返回线程池，否则返回进程池
+        """
+        if GIL_DISABLED:
+            self.logger.info("检测到自由线程解释器，批量解析使用线程池")
+            return ThreadPoolExecutor(
+                max_workers=os.cpu_count(),
+                thread_name_prefix="invoice-parse"
+            )
+        
+        return ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            initializer=_init_parse_worker,
+            initargs=(self.config,)
+        )
+    
+    def parse_invoice_sync(self, ocr_result: Dict[str, Any], output_format: str = "standard") -> Dict[str, Any]:
+        """同步解析发票信息（纯CPU计算，可在线程池或进程池中调用）
+        
         Args:
             ocr_result: OCR识别结果
             output_format: 输出格式 (standard/detailed/raw)
@@ -95,13 +353,41 @@ class InvoiceParser:
             texts = ocr_result.get('recognized_texts', [])
             classification = ocr_result.get('invoice_classification', {})
             
+            # 原始格式直接返回OCR结果，无需任何解析
+            if output_format == "raw":
+                self.logger.info("返回原始OCR结果")
+                return ocr_result
+            
+            # 标准格式下重复提交的相同OCR结果直接命中缓存
+            use_cache = output_format == "standard" and self.config.processing.enable_cache
+            if use_cache:
+                cache_key = self._make_cache_key(texts, classification)
+                with self._result_cache_lock:
+                    cached = self._result_cache.get(cache_key)
+                    if cached is not None:
+                        self._result_cache.move_to_end(cache_key)
+                if cached is not None:
+                    result = copy.deepcopy(cached)
+                    result["meta"]["processing_time"] = ocr_result.get('processing_time', 0)
+                    self.logger.info("发票信息解析完成（命中缓存）")
+                    return result
+            
+            # 每行文本一次关键词扫描，后续判断均使用位掩码
+            masks = self._keyword_masks(texts)
+            
+            # 一次遍历划分销售方/购买方/商品明细区域
+            sections = self._partition_sections(texts, masks)
+            
+            # 一次扫描合并文本，提取整张发票级字段
+            document_fields = self._scan_document_fields(' '.join(texts))
+            
             # 解析各个部分
             invoice_type = self._parse_invoice_type(classification)
-            basic_info = await self._parse_basic_info(texts)
-            seller_info = await self._parse_seller_info(texts)
-            buyer_info = await self._parse_buyer_info(texts)
-            items = await self._parse_items(texts)
-            verification = await self._parse_verification_info(texts)
+            basic_info = self._parse_basic_info(texts, document_fields, masks)
+            seller_info = self._parse_seller_info(sections["seller"])
+            buyer_info = self._parse_buyer_info(sections["buyer"])
+            items = self._parse_items(sections["items"])
+            verification = self._parse_verification_info(document_fields)
             
             # 构建结果
             result = {
@@ -121,9 +407,14 @@ class InvoiceParser:
             # 根据输出格式返回
             if output_format == "detailed":
                 result["raw_ocr_result"] = ocr_result
-                result["parsing_details"] = self._get_parsing_details(texts)
-            elif output_format == "raw":
-                return ocr_result
+                result["parsing_details"] = self._get_parsing_details(texts, masks)
+            
+            if use_cache:
+                cached = copy.deepcopy(result)
+                with self._result_cache_lock:
+                    self._result_cache[cache_key] = cached
+                    if len(self._result_cache) > self._result_cache_size:
+                        self._result_cache.popitem(last=False)
             
             self.logger.info("发票信息解析完成")
             return result
@@ -132,6 +423,24 @@ class InvoiceParser:
             self.logger.error(f"发票解析失败: {str(e)}")
             raise
     
+    def _make_cache_key(self, texts: List[str], classification: Dict[str, Any]) -> bytes:
+        """根据OCR文本和分类结果生成缓存键
+        
+        Args:
+            texts: 文本列表
+            classification: 发票分类结果
+            
+        Returns:
+            16字节的blake2b摘要
+        """
+        payload = json.dumps(
+            {"t": texts, "c": classification},
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+    
     def _parse_invoice_type(self, classification: Dict[str, Any]) -> Dict[str, Any]:
         """解析发票类型
         
@@ -144,15 +453,18 @@ class InvoiceParser:
         invoice_type = classification.get('type', 'unknown')
         confidence = classification.get('confidence', 0.0)
         
-        # 尝试映射到标准类型
+        # 尝试映射到标准类型：先查找包含的标准名称，再查找被包含于标准名称的情况
         type_code = None
         type_name = "未知类型"
         
-        for code, name in self.invoice_types.items():
-            if invoice_type in name or name in invoice_type:
-                type_code = code
-                type_name = name
-                break
+        match = self._type_regex.search(invoice_type)
+        if match:
+            type_name = match.group(0)
+            type_code = self._name_to_code[type_name]
+        else:
+            type_code = self._type_substring_to_code.get(invoice_type)
+            if type_code is not None:
+                type_name = self.invoice_types[type_code]
         
         return {
             "code": type_code,
@@ -161,33 +473,31 @@ class InvoiceParser:
             "raw_type": invoice_type
         }
     
-    async def _parse_basic_info(self, texts: List[str]) -> Dict[str, Any]:
+    def _parse_basic_info(self, texts: List[str], document_fields: Dict[str, Optional[str]],
+                          masks: Optional[List[int]] = None) -> Dict[str, Any]:
         """解析基本信息
         
         Args:
             texts: 文本列表
+            document_fields: _scan_document_fields 的扫描结果
+            masks: 各行文本的关键词位掩码，为None时现场计算
             
         Returns:
             基本信息字典
         """
-        basic_info = {
-            "invoice_number": None,
-            "invoice_date": None,
-            "total_amount": None,
-            "tax_amount": None,
-            "amount_without_tax": None
-        }
-        
-        combined_text = ' '.join(texts)
+        basic_info = self._EMPTY_BASIC_INFO.copy()
         
         # 解析发票号码
-        basic_info["invoice_number"] = self._extract_invoice_number(texts)
+        if masks is None:
+            masks = self._keyword_masks(texts)
+        
+        basic_info["invoice_number"] = self._extract_invoice_number(texts, masks)
         
-        # 解析日期
-        basic_info["invoice_date"] = self._extract_date(combined_text)
+        # 日期已在合并文本扫描中提取
+        basic_info["invoice_date"] = document_fields["invoice_date"]
         
         # 解析金额
-        amounts = self._extract_amounts(texts)
+        amounts = self._extract_amounts(texts, masks)
         if amounts:
             basic_info["total_amount"] = amounts.get("total")
             basic_info["tax_amount"] = amounts.get("tax")
@@ -195,25 +505,16 @@ class InvoiceParser:
         
         return basic_info
     
-    async def _parse_seller_info(self, texts: List[str]) -> Dict[str, Any]:
+    def _parse_seller_info(self, seller_texts: List[str]) -> Dict[str, Any]:
         """解析销售方信息
         
         Args:
-            texts: 文本列表
+            seller_texts: 销售方区域文本列表
             
         Returns:
             销售方信息字典
         """
-        seller_info = {
-            "name": None,
-            "tax_id": None,
-            "address": None,
-            "phone": None,
-            "bank_account": None
-        }
-        
-        # 查找销售方相关文本
-        seller_texts = self._find_seller_section(texts)
+        seller_info = self._EMPTY_PARTY_INFO.copy()
         
         if seller_texts:
             combined_text = ' '.join(seller_texts)
@@ -227,25 +528,16 @@ class InvoiceParser:
         
         return seller_info
     
-    async def _parse_buyer_info(self, texts: List[str]) -> Dict[str, Any]:
+    def _parse_buyer_info(self, buyer_texts: List[str]) -> Dict[str, Any]:
         """解析购买方信息
         
         Args:
-            texts: 文本列表
+            buyer_texts: 购买方区域文本列表
             
         Returns:
             购买方信息字典
         """
-        buyer_info = {
-            "name": None,
-            "tax_id": None,
-            "address": None,
-            "phone": None,
-            "bank_account": None
-        }
-        
-        # 查找购买方相关文本
-        buyer_texts = self._find_buyer_section(texts)
+        buyer_info = self._EMPTY_PARTY_INFO.copy()
         
         if buyer_texts:
             combined_text = ' '.join(buyer_texts)
@@ -259,20 +551,17 @@ class InvoiceParser:
         
         return buyer_info
     
-    async def _parse_items(self, texts: List[str]) -> List[Dict[str, Any]]:
+    def _parse_items(self, item_texts: List[str]) -> List[Dict[str, Any]]:
         """解析商品明细
         
         Args:
-            texts: 文本列表
+            item_texts: 商品明细区域文本列表
             
         Returns:
             商品明细列表
         """
         items = []
         
-        # 查找商品明细表格区域
-        item_texts = self._find_items_section(texts)
-        
         if item_texts:
             # 解析表格行
             for item_text in item_texts:
@@ -282,109 +571,161 @@ class InvoiceParser:
         
         return items
     
-    async def _parse_verification_info(self, texts: List[str]) -> Dict[str, Any]:
+    def _parse_verification_info(self, document_fields: Dict[str, Optional[str]]) -> Dict[str, Any]:
         """解析验证信息
         
         Args:
-            texts: 文本列表
+            document_fields: _scan_document_fields 的扫描结果
             
         Returns:
             验证信息字典
         """
         verification = {
-            "check_code": None,
-            "machine_number": None,
+            "check_code": document_fields["check_code"],
+            "machine_number": document_fields["machine_number"],
             "is_valid": True
         }
         
-        combined_text = ' '.join(texts)
+        return verification
+    
+    def _scan_document_fields(self, combined_text: str) -> Dict[str, Optional[str]]:
+        """用融合模式单次扫描合并文本，提取日期、校验码和机器编号
         
-        # 提取校验码
-        verification["check_code"] = self._extract_check_code(combined_text)
+        每个字段取第一个有效匹配（无效日期会被跳过）
         
-        # 提取机器编号
-        verification["machine_number"] = self._extract_machine_number(combined_text)
+        Args:
+            combined_text: 合并后的全部文本
+            
+        Returns:
+            {"invoice_date": ..., "check_code": ..., "machine_number": ...}
+        """
+        fields: Dict[str, Optional[str]] = self._EMPTY_DOCUMENT_FIELDS.copy()
+        
+        # Hyperscan预扫描：没有任何候选时直接返回，否则从首个候选位置开始用re提取分组
+        start = 0
+        if self._document_field_db is not None and len(combined_text) >= self._hyperscan_min_length:
+            start = self._find_first_document_field(combined_text)
+            if start is None:
+                return fields
+        
+        for match in self.document_field_pattern.finditer(combined_text, start):
+            group = match.lastgroup
+            if group == "date":
+                if fields["invoice_date"] is None:
+                    fields["invoice_date"] = self._format_date(
+                        match.group("year"), match.group("month"), match.group("day")
+                    )
+            elif fields[group] is None:
+                fields[group] = match.group(group)
+            
+            if all(value is not None for value in fields.values()):
+                break
         
-        return verification
+        return fields
     
-    def _extract_invoice_number(self, texts: List[str]) -> Optional[str]:
-        """提取发票号码"""
-        for text in texts:
-            if '发票号码' in text or '号码' in text:
-                matches = self.invoice_number_pattern.findall(text)
-                if matches:
-                    return matches[0]
+    def _find_first_document_field(self, combined_text: str) -> Optional[int]:
+        """用Hyperscan定位最左侧候选字段的字符偏移
         
-        # 如果没找到，尝试在所有文本中查找最长的数字串
-        all_numbers = []
-        for text in texts:
-            numbers = self.invoice_number_pattern.findall(text)
-            all_numbers.extend(numbers)
+        Args:
+            combined_text: 合并后的全部文本
+            
+        Returns:
+            首个候选匹配的起始字符位置，没有候选时返回None
+        """
+        # Hyperscan的scratch不能跨线程共用，每个线程各持一份
+        scratch = getattr(self._hyperscan_local, 'scratch', None)
+        if scratch is None:
+            scratch = hyperscan.Scratch(self._document_field_db)
+            self._hyperscan_local.scratch = scratch
         
-        if all_numbers:
-            # 返回最长的数字串
-            return max(all_numbers, key=len)
+        encoded = combined_text.encode('utf-8')
+        leftmost = [len(encoded)]
         
-        return None
+        def on_match(pattern_id, start, end, flags, context):
+            if start < leftmost[0]:
+                leftmost[0] = start
+        
+        self._document_field_db.scan(encoded, match_event_handler=on_match, scratch=scratch)
+        
+        if leftmost[0] == len(encoded):
+            return None
+        
+        # 字节偏移转换为字符偏移（SOM位于UTF-8字符边界）
+        return len(encoded[:leftmost[0]].decode('utf-8'))
+    
+    def _extract_invoice_number(self, texts: List[str], masks: Optional[List[int]] = None) -> Optional[str]:
+        """提取发票号码
+        
+        单次遍历：含"号码"关键词的文本中的首个数字串优先直接返回，
+        否则返回所有文本中最长的数字串（等长取最先出现者）
+        """
+        if masks is None:
+            masks = self._keyword_masks(texts)
+        
+        keyword_mask = self._invoice_number_mask
+        longest = None
+        
+        for text, mask in zip(texts, masks):
+            if mask & keyword_mask:
+                match = self.invoice_number_pattern.search(text)
+                if match:
+                    return match.group(0)
+                continue
+            
+            for number in self.invoice_number_pattern.findall(text):
+                if longest is None or len(number) > len(longest):
+                    longest = number
+        
+        return longest
     
     def _extract_date(self, text: str) -> Optional[str]:
         """提取日期"""
         for pattern in self.date_patterns:
             match = pattern.search(text)
             if match:
-                try:
-                    year, month, day = match.groups()
-                    # 格式化为标准日期格式
-                    date = datetime(int(year), int(month), int(day))
-                    return date.strftime('%Y-%m-%d')
-                except ValueError:
-                    continue
+                date = self._format_date(*match.groups())
+                if date:
+                    return date
         
         return None
     
-    def _extract_amounts(self, texts: List[str]) -> Dict[str, Optional[str]]:
-        """提取金额信息"""
+    def _format_date(self, year: str, month: str, day: str) -> Optional[str]:
+        """格式化为标准日期格式，无效日期返回None"""
+        try:
+            return datetime(int(year), int(month), int(day)).strftime('%Y-%m-%d')
+        except ValueError:
+            return None
+    
+    def _extract_amounts(self, texts: List[str], masks: Optional[List[int]] = None) -> Dict[str, Optional[str]]:
+        """提取金额信息
+        
+        每行按 合计/总计 > 税额 > 不含税/金额 的优先级归入一个类别，
+        同一类别后出现的金额覆盖先出现的
+        """
         amounts = {
             "total": None,
             "tax": None,
             "without_tax": None
         }
         
-        for text in texts:
-            text_lower = text.lower()
-            
-            # 提取总额
-            if '合计' in text or '总计' in text or '价税合计' in text:
-                amount = self._extract_single_amount(text)
-                if amount:
-                    amounts["total"] = amount
-            
-            # 提取税额
-            elif '税额' in text:
-                amount = self._extract_single_amount(text)
-                if amount:
-                    amounts["tax"] = amount
-            
-            # 提取不含税金额
-            elif '不含税' in text or '金额' in text:
-                amount = self._extract_single_amount(text)
-                if amount:
-                    amounts["without_tax"] = amount
+        if masks is None:
+            masks = self._keyword_masks(texts)
+        
+        for text, mask in zip(texts, masks):
+            for kind, kind_mask in self._amount_masks:
+                if mask & kind_mask:
+                    amount = self._extract_single_amount(text)
+                    if amount:
+                        amounts[kind] = amount
+                    break
         
         return amounts
     
     def _extract_single_amount(self, text: str) -> Optional[str]:
         """从文本中提取单个金额"""
-        for pattern in self.amount_patterns:
-            match = pattern.search(text)
-            if match:
-                amount = match.group(1).replace(',', '')
-                try:
-                    # 验证是否为有效数字
-                    float(amount)
-                    return amount
-                except ValueError:
-                    continue
+        match = self.amount_pattern.search(text)
+        if match:
+            return match.group(1).replace(',', '')
         
         return None
     
@@ -414,19 +755,24 @@ class InvoiceParser:
         return None
     
     def _extract_address(self, text: str) -> Optional[str]:
-        """提取地址信息"""
-        # 查找包含地址关键词的部分
-        address_keywords = ['市', '区', '县', '路', '街', '号', '室', '楼']
-        
-        for keyword in address_keywords:
-            if keyword in text:
-                # 提取包含关键词的连续文本段
-                parts = text.split()
-                for part in parts:
-                    if keyword in part and len(part) > 5:
-                        return part
+        """提取地址信息
         
-        return None
+        一次正则扫描找出所有候选文本段，按关键词优先级（市 > 区 > ... > 楼）
+        选取，同一优先级取最先出现的文本段
+        """
+        rank_of = self._address_keyword_rank
+        best_part = None
+        best_rank = len(rank_of)
+        
+        for match in self.address_pattern.finditer(text):
+            part = match.group(0)
+            rank = min(rank_of[char] for char in part if char in rank_of)
+            if rank < best_rank:
+                best_part, best_rank = part, rank
+                if rank == 0:
+                    break
+        
+        return best_part
     
     def _extract_company_name(self, texts: List[str], entity_type: str) -> Optional[str]:
         """提取公司名称"""
@@ -452,73 +798,83 @@ class InvoiceParser:
     
     def _extract_check_code(self, text: str) -> Optional[str]:
         """提取校验码"""
-        # 校验码通常是8-12位数字
-        check_code_pattern = re.compile(r'校验码[：:]?\s*([0-9]{8,12})')
-        match = check_code_pattern.search(text)
+        match = self.check_code_pattern.search(text)
         if match:
-            return match.group(1)
+            return match.group("check_code")
         
         return None
     
     def _extract_machine_number(self, text: str) -> Optional[str]:
         """提取机器编号"""
-        # 机器编号通常是12位数字
-        machine_pattern = re.compile(r'机器编号[：:]?\s*([0-9]{12})')
-        match = machine_pattern.search(text)
+        match = self.machine_number_pattern.search(text)
         if match:
-            return match.group(1)
+            return match.group("machine_number")
         
         return None
     
-    def _find_seller_section(self, texts: List[str]) -> List[str]:
-        """查找销售方信息区域"""
-        seller_texts = []
-        seller_keywords = ["销售方", "开票方", "出售方"]
-        
-        found_seller = False
-        for text in texts:
-            if any(keyword in text for keyword in seller_keywords):
-                found_seller = True
-                seller_texts.append(text)
-            elif found_seller and any(keyword in text for keyword in ["购买方", "收票方", "商品"]):
-                break
-            elif found_seller:
-                seller_texts.append(text)
-        
-        return seller_texts
+    def _keywords_to_mask(self, keywords: List[str]) -> int:
+        """关键词列表转换为位掩码"""
+        mask = 0
+        for keyword in keywords:
+            mask |= self._keyword_bits[keyword]
+        return mask
+    
+    def _keyword_mask(self, text: str) -> int:
+        """一次扫描得到文本中出现的所有关键词的位掩码"""
+        mask = 0
+        if self._keyword_automaton is not None:
+            for _, bit in self._keyword_automaton.iter(text):
+                mask |= bit
+        else:
+            for keyword, bit in self._keyword_bits.items():
+                if keyword in text:
+                    mask |= bit
+        return mask
     
-    def _find_buyer_section(self, texts: List[str]) -> List[str]:
-        """查找购买方信息区域"""
-        buyer_texts = []
-        buyer_keywords = ["购买方", "收票方", "购方"]
+    def _keyword_masks(self, texts: List[str]) -> List[int]:
+        """计算每行文本的关键词位掩码"""
+        return [self._keyword_mask(text) for text in texts]
+    
+    def _partition_sections(self, texts: List[str], masks: Optional[List[int]] = None) -> Dict[str, List[str]]:
+        """一次遍历划分销售方、购买方和商品明细区域
         
-        found_buyer = False
-        for text in texts:
-            if any(keyword in text for keyword in buyer_keywords):
-                found_buyer = True
-                buyer_texts.append(text)
-            elif found_buyer and any(keyword in text for keyword in ["商品", "合计", "税额"]):
-                break
-            elif found_buyer:
-                buyer_texts.append(text)
+        每行文本只做一次多关键词匹配，三个区域的状态同时推进，
+        各区域的开始/结束规则见 self.section_rules
         
-        return buyer_texts
-    
-    def _find_items_section(self, texts: List[str]) -> List[str]:
-        """查找商品明细区域"""
-        item_texts = []
-        item_keywords = ["商品名称", "货物", "商品", "明细"]
+        Args:
+            texts: 文本列表
+            masks: 各行文本的关键词位掩码，为None时现场计算
+            
+        Returns:
+            {"seller": [...], "buyer": [...], "items": [...]}
+        """
+        sections: Dict[str, List[str]] = {name: [] for name in self.section_rules}
+        # 区域状态: None=未开始, True=进行中, False=已结束
+        states: Dict[str, Optional[bool]] = dict.fromkeys(self.section_rules)
         
-        found_items = False
-        for text in texts:
-            if any(keyword in text for keyword in item_keywords):
-                found_items = True
-            elif found_items and ("合计" in text or "总计" in text):
+        if masks is None:
+            masks = self._keyword_masks(texts)
+        
+        for text, mask in zip(texts, masks):
+            for name, rule in self.section_rules.items():
+                state = states[name]
+                if state is False:
+                    continue
+                
+                start_mask, end_mask = self._section_masks[name]
+                if mask & start_mask:
+                    states[name] = True
+                    if rule["include_start"]:
+                        sections[name].append(text)
+                elif state and mask & end_mask:
+                    states[name] = False
+                elif state:
+                    sections[name].append(text)
+            
+            if all(state is False for state in states.values()):
                 break
-            elif found_items:
-                item_texts.append(text)
         
-        return item_texts
+        return sections
     
     def _parse_single_item(self, text: str) -> Optional[Dict[str, Any]]:
         """解析单个商品项"""
@@ -553,30 +909,40 @@ class InvoiceParser:
         
         # 根据识别到的文本数量调整置信度
         texts = ocr_result.get('recognized_texts', [])
-        text_count = len([t for t in texts if t.strip()])
-        
-        if text_count > 20:
-            text_confidence = 0.9
-        elif text_count > 10:
-            text_confidence = 0.7
-        elif text_count > 5:
-            text_confidence = 0.5
-        else:
-            text_confidence = 0.3
+        text_count = sum(1 for t in texts if t.strip())
+        text_confidence = self.text_count_confidences[bisect.bisect_left(self.text_count_bounds, text_count)]
         
         # 综合置信度
         overall_confidence = (classification_confidence * 0.6 + text_confidence * 0.4)
         return round(overall_confidence, 3)
     
-    def _get_parsing_details(self, texts: List[str]) -> Dict[str, Any]:
-        """获取解析详情（用于详细输出格式）"""
+    def _get_parsing_details(self, texts: List[str], masks: List[int]) -> Dict[str, Any]:
+        """获取解析详情（用于详细输出格式）
+        
+        Args:
+            texts: 文本列表
+            masks: 各行文本的关键词位掩码
+            
+        Returns:
+            解析详情字典
+        """
+        seen_mask = 0
+        for mask in masks:
+            seen_mask |= mask
+        
         return {
             "total_text_regions": len(texts),
-            "non_empty_regions": len([t for t in texts if t.strip()]),
+            "non_empty_regions": sum(1 for t in texts if t.strip()),
             "detected_patterns": {
-                "has_invoice_number": any('发票号码' in t for t in texts),
-                "has_seller_info": any('销售方' in t for t in texts),
-                "has_buyer_info": any('购买方' in t for t in texts),
-                "has_amount_info": any('合计' in t or '金额' in t for t in texts)
+                flag: bool(seen_mask & flag_mask)
+                for flag, flag_mask in self._detail_masks.items()
             }
-        } 
\ No newline at end of file
+        }
+    
+    async def cleanup(self) -> None:
+        """清理资源"""
+        if self._batch_executor is not None:
+            self._batch_executor.shutdown(wait=False, **_SHUTDOWN_KWARGS)
+            self._batch_executor = None
+        
+        self._result_cache.clear()
@@ -5,14 +5,16 @@
 """
 
 import asyncio
+import inspect
 import logging
 import os
+import sys
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 from pathlib import Path
 import shutil
-import hashlib
 
 try:
     from modelscope.hub.api import HubApi
@@ -23,8 +25,16 @@ except ImportError:
     HubApi = None
     snapshot_download = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from ..config import Config
 
+# Executor.shutdown的cancel_futures参数自Python 3.9起才支持
+_SHUTDOWN_KWARGS = {"cancel_futures": True} if sys.version_info >= (3, 9) else {}
+
 
 class ModelManager:
     """模型管理器"""
@@ -48,14 +58,45 @@ class ModelManager:
         # 模型状态
         self.model_registry = self._load_registry()
         
+        # 并发下载时保护注册表的读改写（首次使用时在运行中的事件循环内创建，
+        # Python 3.8/3.9的asyncio.Lock会在构造时绑定当时的事件循环）
+        self._registry_lock: Optional[asyncio.Lock] = None
+        
+        # 注册表存在尚未落盘的修改
+        self._registry_dirty = False
+        
+        # 本地模型目录存在性校验的有效期（秒），有效期内不再重复stat
+        self._verify_interval = 3600
+        
+        # 模型下载专用线程池，并发上限显式可配，不占用事件循环默认线程池
+        self._download_executor = ThreadPoolExecutor(
+            max_workers=config.models.max_parallel_downloads or 4,
+            thread_name_prefix="model-dl"
+        )
+        
+        # 新版ModelScope支持在单个模型内并发下载多个文件（大文件按分片并发）
+        self._snapshot_supports_workers = (
+            snapshot_download is not None
+            and "max_workers" in inspect.signature(snapshot_download).parameters
+        )
+        
         self.logger.info(f"模型管理器初始化完成，缓存目录: {self.cache_dir}")
     
+    def _get_registry_lock(self) -> asyncio.Lock:
+        """返回注册表锁，首次调用时创建（须在协程中调用）"""
+        if self._registry_lock is None:
+            self._registry_lock = asyncio.Lock()
+        return self._registry_lock
+    
     def _load_registry(self) -> Dict[str, Any]:
         """加载模型注册表"""
         if self.registry_file.exists():
             try:
-                with open(self.registry_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                # 直接读取字节交给解析器，省去文本解码
+                data = self.registry_file.read_bytes()
+                if orjson is not None:
+                    return orjson.loads(data)
+                return json.loads(data)
             except Exception as e:
                 self.logger.warning(f"加载模型注册表失败: {str(e)}")
         
@@ -69,14 +110,25 @@ class ModelManager:
         """保存模型注册表"""
         try:
             self.model_registry["last_updated"] = time.time()
-            with open(self.registry_file, 'w', encoding='utf-8') as f:
-                json.dump(self.model_registry, f, indent=2, ensure_ascii=False)
+            self._registry_dirty = False
+            if orjson is not None:
+                data = orjson.dumps(self.model_registry, option=orjson.OPT_INDENT_2)
+            else:
+                data = json.dumps(self.model_registry, indent=2, ensure_ascii=False).encode('utf-8')
+            
+            # 先写临时文件再原子替换，避免写入中途崩溃损坏注册表
+            tmp_file = self.registry_file.with_suffix('.tmp')
+            tmp_file.write_bytes(data)
+            os.replace(tmp_file, self.registry_file)
         except Exception as e:
             self.logger.error(f"保存模型注册表失败: {str(e)}")
     
-    async def download_all_models(self) -> Dict[str, Any]:
-        """下载所有需要的模型
+    async def download_all_models(self, max_concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """并发下载所有需要的模型
         
+        Args:
+            max_concurrency: 最大并发下载数，None表示不限制
+            
         Returns:
             下载结果统计
         """
@@ -111,29 +163,48 @@ class ModelManager:
         
         self.logger.info(f"开始下载 {len(models_to_download)} 个模型")
         
-        for model_info in models_to_download:
-            try:
-                result = await self.download_model(
-                    model_info["name"],
-                    model_info["model_id"], 
-                    model_info["revision"]
+        semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        
+        async def _download_one(model_info: Dict[str, Any]) -> Dict[str, Any]:
+            if semaphore is None:
+                return await self.download_model(
+                    model_info["name"], model_info["model_id"], model_info["revision"],
+                    save_registry=False
                 )
-                
-                if result["success"]:
-                    successful += 1
-                else:
-                    failed += 1
-                
-                results.append(result)
-                
-            except Exception as e:
-                self.logger.error(f"下载模型失败 {model_info['name']}: {str(e)}")
+            async with semaphore:
+                return await self.download_model(
+                    model_info["name"], model_info["model_id"], model_info["revision"],
+                    save_registry=False
+                )
+        
+        # 各模型下载均为I/O密集型，并发执行，总耗时取决于最大的模型
+        gathered = await asyncio.gather(
+            *[_download_one(model_info) for model_info in models_to_download],
+            return_exceptions=True
+        )
+        
+        # 所有下载结束后统一保存一次注册表
+        async with self._get_registry_lock():
+            if self._registry_dirty:
+                self._save_registry()
+        
+        for model_info, result in zip(models_to_download, gathered):
+            if isinstance(result, BaseException):
+                self.logger.error(f"下载模型失败 {model_info['name']}: {str(result)}")
                 failed += 1
                 results.append({
                     "model_name": model_info["name"],
                     "success": False,
-                    "error": str(e)
+                    "error": str(result)
                 })
+                continue
+            
+            if result["success"]:
+                successful += 1
+            else:
+                failed += 1
+            
+            results.append(result)
         
         total_time = time.time() - start_time
         
@@ -150,13 +221,15 @@ class ModelManager:
     async def download_model(self, 
                            model_name: str, 
                            model_id: str, 
-                           revision: str = None) -> Dict[str, Any]:
+                           revision: str = None,
+                           save_registry: bool = True) -> Dict[str, Any]:
         """下载单个模型
         
         Args:
             model_name: 模型名称
             model_id: ModelScope模型ID
             revision: 模型版本
+            save_registry: 是否立即保存注册表，为False时仅标记待保存，由调用方统一落盘
             
         Returns:
             下载结果
@@ -179,20 +252,25 @@ class ModelManager:
                 }
             
             # 下载模型
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
+            
+            download_kwargs = {}
+            if self._snapshot_supports_workers:
+                download_kwargs["max_workers"] = self.config.models.download_file_workers
             
             def _download():
                 return snapshot_download(
                     model_id,
                     revision=revision,
                     cache_dir=str(self.cache_dir),
-                    ignore_file_pattern=[r"\.git", r"\.gitignore", r"\.gitattributes"]
+                    ignore_file_pattern=[r"\.git", r"\.gitignore", r"\.gitattributes"],
+                    **download_kwargs
                 )
             
             if snapshot_download is None:
                 raise ImportError("ModelScope未安装")
             
-            model_path = await loop.run_in_executor(None, _download)
+            model_path = await loop.run_in_executor(self._download_executor, _download)
             
             # 验证下载结果
             model_path = Path(model_path)
@@ -203,15 +281,19 @@ class ModelManager:
             model_size = self._calculate_directory_size(model_path)
             
             # 更新注册表
-            self.model_registry["models"][model_name] = {
-                "model_id": model_id,
-                "revision": revision,
-                "local_path": str(model_path),
-                "download_time": time.time(),
-                "size_bytes": model_size,
-                "status": "ready"
-            }
-            self._save_registry()
+            async with self._get_registry_lock():
+                self.model_registry["models"][model_name] = {
+                    "model_id": model_id,
+                    "revision": revision,
+                    "local_path": str(model_path),
+                    "download_time": time.time(),
+                    "verified_at": time.time(),
+                    "size_bytes": model_size,
+                    "status": "ready"
+                }
+                self._registry_dirty = True
+                if save_registry:
+                    self._save_registry()
             
             download_time = time.time() - start_time
             
@@ -266,9 +348,21 @@ class ModelManager:
         
         # 检查本地文件是否存在
         local_path = model_info.get("local_path")
-        if not local_path or not Path(local_path).exists():
+        if not local_path:
+            return False
+        
+        # 近期已确认存在的模型直接信任注册表，跳过文件系统检查
+        now = time.time()
+        if now - model_info.get("verified_at", 0) < self._verify_interval:
+            return True
+        
+        if not Path(local_path).exists():
             return False
         
+        # 只标记待保存，由批量保存（download_all_models结束时或cleanup）统一落盘
+        model_info["verified_at"] = now
+        self._registry_dirty = True
+        
         return True
     
     def get_model_info(self, model_name: str) -> Optional[Dict[str, Any]]:
@@ -345,8 +439,9 @@ class ModelManager:
                 self.logger.info(f"删除模型文件: {local_path}")
             
             # 从注册表中移除
-            del self.model_registry["models"][model_name]
-            self._save_registry()
+            async with self._get_registry_lock():
+                del self.model_registry["models"][model_name]
+                self._save_registry()
             
             self.logger.info(f"删除模型成功: {model_name}")
             return True
@@ -367,17 +462,28 @@ class ModelManager:
         total_size = 0
         
         try:
-            for file_path in directory.rglob('*'):
-                if file_path.is_file():
-                    total_size += file_path.stat().st_size
+            # 基于os.scandir的迭代遍历：直接使用DirEntry缓存的类型信息，不为每个条目创建Path对象
+            pending = [str(directory)]
+            while pending:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file():
+                            total_size += entry.stat().st_size
         except Exception as e:
             self.logger.warning(f"计算目录大小失败: {directory}, 错误: {str(e)}")
         
         return total_size
     
-    def get_cache_stats(self) -> Dict[str, Any]:
+    def get_cache_stats(self, refresh: bool = False) -> Dict[str, Any]:
         """获取缓存统计信息
         
+        模型大小默认直接取下载时记录在注册表中的值，不遍历文件系统
+        
+        Args:
+            refresh: 是否重新遍历模型目录计算大小并写回注册表
+            
         Returns:
             缓存统计信息
         """
@@ -386,10 +492,15 @@ class ModelManager:
         ready_models = 0
         
         for model_info in self.model_registry["models"].values():
+            if refresh and model_info.get("local_path"):
+                model_info["size_bytes"] = self._calculate_directory_size(Path(model_info["local_path"]))
             if model_info.get("status") == "ready":
                 ready_models += 1
             total_size += model_info.get("size_bytes", 0)
         
+        if refresh:
+            self._save_registry()
+        
         # 获取缓存目录可用空间
         cache_stat = shutil.disk_usage(self.cache_dir)
         
@@ -424,6 +535,7 @@ class ModelManager:
             download_time = model_info.get("download_time", current_time)
             
             if download_time < keep_threshold:
+                # 释放空间按注册表记录统计，删除前不再遍历目录
                 model_size = model_info.get("size_bytes", 0)
                 
                 if await self.delete_model(model_name):
@@ -437,4 +549,14 @@ class ModelManager:
             "cleaned_count": len(cleaned_models),
             "cleaned_size_bytes": cleaned_size,
             "cleaned_size_mb": round(cleaned_size / 1024 / 1024, 2)
-        } 
\ No newline at end of file
+        }
+    
+    async def cleanup(self) -> None:
+        """清理资源"""
+        self._download_executor.shutdown(wait=False, **_SHUTDOWN_KWARGS)
+        
+        # 保存尚未落盘的注册表修改（如刷新的校验时间、单独下载时未立即保存的记录）
+        async with self._get_registry_lock():
+            if self._registry_dirty:
+                self._save_registry()
+        self.logger.info("模型管理器资源清理完成")
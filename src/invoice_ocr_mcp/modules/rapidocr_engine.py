@@ -5,20 +5,130 @@ RapidOCR引擎模块（v3.2.0适配）
 """
 
 import asyncio
+import hashlib
 import logging
+import mmap
+import re
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import cv2
 import base64
-from io import BytesIO
-from PIL import Image
 
 from rapidocr import RapidOCR  # 只保留v3.2.0
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 from ..config import Config
 from .utils import setup_logging
 
+# 各发票类型的分类关键词及权重：(类型, ((关键词, 权重), ...))
+_TYPE_KEYWORD_TABLE = (
+    ("general_invoice", (("增值税普通发票", 3), ("普通发票", 2), ("发票代码", 2), ("发票号码", 2), ("开票日期", 1))),
+    ("vat_invoice", (("增值税专用发票", 5), ("专用发票", 3), ("纳税人识别号", 2), ("税额", 2), ("价税合计", 2))),
+    ("electronic_invoice", (("电子发票", 4), ("电子普通发票", 3), ("二维码", 1), ("验证码", 1))),
+    ("receipt", (("收据", 3), ("收款收据", 2), ("往来款项收据", 2), ("收费收据", 2))),
+    ("train_ticket", (("车票", 3), ("火车票", 3), ("高铁票", 3), ("动车票", 3), ("席别", 2), ("车次", 2))),
+    ("taxi_ticket", (("出租车票", 4), ("的士票", 3), ("计程车", 3), ("里程", 2), ("等候时间", 1))),
+    ("air_ticket", (("登机牌", 4), ("机票", 3), ("航班", 2), ("座位号", 1), ("登机口", 1))),
+    ("hotel_invoice", (("住宿发票", 4), ("酒店发票", 3), ("宾馆", 2), ("房费", 2), ("住宿费", 2))),
+    ("catering_invoice", (("餐饮发票", 3), ("餐费", 2), ("服务费", 1), ("酒水", 1), ("用餐", 1))),
+)
+
+# 各类型关键词权重之和，用于把得分归一化为all_scores
+_TYPE_MAX_WEIGHTS = {
+    invoice_type: sum(weight for _, weight in keywords)
+    for invoice_type, keywords in _TYPE_KEYWORD_TABLE
+}
+
+# Executor.shutdown的cancel_futures参数自Python 3.9起才支持
+_SHUTDOWN_KWARGS = {"cancel_futures": True} if sys.version_info >= (3, 9) else {}
+
+_ALL_KEYWORDS = tuple(
+    keyword for _, keywords in _TYPE_KEYWORD_TABLE for keyword, _ in keywords
+)
+
+
+def _build_keyword_automaton() -> Optional[Any]:
+    """构建分类关键词的Aho-Corasick自动机，未安装pyahocorasick时返回None"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in _ALL_KEYWORDS:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+# 自动机只读，进程内各引擎共用
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+@lru_cache(maxsize=4)
+def _get_rapidocr(batch_size: int, max_side_len: int, use_gpu: bool, device_id: int) -> RapidOCR:
+    """按配置获取进程内共享的RapidOCR实例
+    
+    onnxruntime会话支持多线程并发推理，同一配置的多个引擎共用一份模型权重。
+    
+    Args:
+        batch_size: 方向分类与文本识别的批大小
+        max_side_len: 检测前图像长边上限
+        use_gpu: 是否使用CUDA执行器
+        device_id: GPU设备号
+        
+    Returns:
+        RapidOCR实例
+    """
+    # 方向分类与文本识别按批次处理裁剪出的文本行，一次前向推理覆盖多行
+    params = {
+        "Cls.cls_batch_num": batch_size,
+        "Rec.rec_batch_num": batch_size,
+        # 检测计算量约与像素数成正比：超大扫描件先等比缩小，检测框由RapidOCR映射回原图坐标
+        "Global.max_side_len": max_side_len,
+    }
+    # 启用GPU时让onnxruntime走CUDA执行器
+    if use_gpu:
+        params["EngineConfig.onnxruntime.use_cuda"] = True
+        params["EngineConfig.onnxruntime.cuda_ep_cfg.device_id"] = device_id
+    return RapidOCR(params=params)
+
+
+def _to_text_regions(result: Any) -> List[Dict[str, Any]]:
+    """把RapidOCR输出转换为文本区域列表"""
+    # v3.2.0: result.boxes, result.txts, result.scores
+    detected_regions = []
+    boxes = getattr(result, 'boxes', [])
+    txts = getattr(result, 'txts', [])
+    scores = getattr(result, 'scores', [])
+    for box, text, score in zip(boxes, txts, scores):
+        detected_regions.append({
+            'bbox': box,
+            'text': text,
+            'confidence': float(score)
+        })
+    return detected_regions
+
+
+# 进程池工作进程内的RapidOCR实例（每个进程初始化一次）
+_worker_engine: Optional[RapidOCR] = None
+
+
+def _init_ocr_worker(batch_size: int, max_side_len: int) -> None:
+    """进程池工作进程初始化：加载本进程的CPU推理实例"""
+    global _worker_engine
+    _worker_engine = _get_rapidocr(batch_size, max_side_len, False, 0)
+
+
+def _detect_in_worker(image: np.ndarray) -> List[Dict[str, Any]]:
+    """在工作进程中执行文本检测与识别"""
+    return _to_text_regions(_worker_engine(image))
+
 
 class RapidOCREngine:
     """RapidOCR引擎类（v3.2.0）"""
@@ -26,46 +136,115 @@ class RapidOCREngine:
     def __init__(self, config: Config):
         self.config = config
         self.logger = setup_logging(config)
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.executor = ThreadPoolExecutor(max_workers=config.processing.parallel_workers)
+        # 纯CPU推理可选的进程池：各工作进程持有独立的模型实例，推理在多个CPU核心上并行
+        self._process_pool: Optional[ProcessPoolExecutor] = None
         self._engine = None
         self._initialized = False
+        # 防止并发请求重复加载模型（在initialize中创建，Python 3.8/3.9的asyncio.Lock
+        # 会在构造时绑定当时的事件循环）
+        self._init_lock: Optional[asyncio.Lock] = None
+        
+        # 检测结果缓存（图像内容哈希 -> 文本区域），相同页面重复识别时跳过推理
+        self._det_cache: "OrderedDict[bytes, List[Dict[str, Any]]]" = OrderedDict()
+        self._det_cache_size = 256
+        self._det_cache_lock = threading.Lock()
+        
+        # 分类关键词自动机：一次线性扫描找出文本中出现的全部关键词
+        self._keyword_automaton = _KEYWORD_AUTOMATON
+        
+        # 关键信息提取规则
+        self._compile_patterns()
     
     async def initialize(self) -> None:
         """初始化RapidOCR引擎"""
         if self._initialized:
             return
-        self.logger.info("正在初始化RapidOCR v3.2.0引擎...")
-        loop = asyncio.get_event_loop()
-        self._engine = await loop.run_in_executor(self.executor, RapidOCR)
-        self._initialized = True
-        self.logger.info("RapidOCR v3.2.0引擎初始化完成")
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        async with self._init_lock:
+            if self._initialized:
+                return
+            self.logger.info("正在初始化RapidOCR v3.2.0引擎...")
+            if self.config.ocr_engine.rapidocr_process_pool:
+                if self.config.ocr_engine.rapidocr_use_gpu:
+                    # GPU推理由CUDA执行，多进程只会重复占用显存
+                    self.logger.warning("启用GPU时忽略进程池配置，推理继续使用线程池")
+                else:
+                    self._process_pool = self._create_process_pool()
+                    self._initialized = True
+                    self.logger.info("RapidOCR v3.2.0引擎初始化完成（进程池推理）")
+                    return
+            loop = asyncio.get_running_loop()
+            self._engine = await loop.run_in_executor(
+                self.executor,
+                _get_rapidocr,
+                self.config.processing.recognition_batch_size,
+                self.config.processing.ocr_max_side_len,
+                self.config.ocr_engine.rapidocr_use_gpu,
+                self.config.ocr_engine.rapidocr_device_id
+            )
+            self._initialized = True
+            self.logger.info("RapidOCR v3.2.0引擎初始化完成")
+
+    def _create_process_pool(self) -> ProcessPoolExecutor:
+        """创建CPU推理进程池
+        
+        Returns:
+            工作进程数与parallel_workers一致的进程池
+        """
+        return ProcessPoolExecutor(
+            max_workers=self.config.processing.parallel_workers,
+            initializer=_init_ocr_worker,
+            initargs=(
+                self.config.processing.recognition_batch_size,
+                self.config.processing.ocr_max_side_len
+            )
+        )
 
     async def detect_text(self, image: np.ndarray) -> List[Dict[str, Any]]:
         """检测图像中的文本区域"""
-        await self.initialize()
-        loop = asyncio.get_event_loop()
-        def _detect():
-            result = self._engine(image, return_word_box=True, return_single_char_box=True)
-            # v3.2.0: result.boxes, result.txts, result.scores
-            detected_regions = []
-            boxes = getattr(result, 'boxes', [])
-            txts = getattr(result, 'txts', [])
-            scores = getattr(result, 'scores', [])
-            for box, text, score in zip(boxes, txts, scores):
-                detected_regions.append({
-                    'bbox': box,
-                    'text': text,
-                    'confidence': float(score)
-                })
-            return detected_regions
+        if not self._initialized:
+            await self.initialize()
+        loop = asyncio.get_running_loop()
         try:
-            result = await loop.run_in_executor(self.executor, _detect)
+            result = await loop.run_in_executor(self.executor, self._detect_sync, image)
             self.logger.debug(f"文本检测完成，发现 {len(result)} 个文本区域")
             return result
         except Exception as e:
             self.logger.error(f"文本检测失败: {e}")
             return []
 
+    def _detect_sync(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """在工作线程中执行文本检测与识别（命中缓存时跳过推理，启用进程池时交给工作进程推理）"""
+        use_cache = self.config.processing.enable_cache
+        if use_cache:
+            cache_key = self._make_image_key(image)
+            with self._det_cache_lock:
+                cached = self._det_cache.get(cache_key)
+                if cached is not None:
+                    self._det_cache.move_to_end(cache_key)
+            if cached is not None:
+                return [dict(region) for region in cached]
+        if self._process_pool is not None:
+            detected_regions = self._process_pool.submit(_detect_in_worker, image).result()
+        else:
+            detected_regions = _to_text_regions(self._engine(image))
+        if use_cache:
+            with self._det_cache_lock:
+                self._det_cache[cache_key] = [dict(region) for region in detected_regions]
+                if len(self._det_cache) > self._det_cache_size:
+                    self._det_cache.popitem(last=False)
+        return detected_regions
+
+    @staticmethod
+    def _make_image_key(image: np.ndarray) -> bytes:
+        """根据图像尺寸和像素内容生成缓存键"""
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(f"{image.shape}{image.dtype}".encode())
+        hasher.update(np.ascontiguousarray(image).data)
+        return hasher.digest()
+
     async def recognize_text(self, image: np.ndarray) -> List[str]:
         """识别图像中的文本内容"""
         detected_regions = await self.detect_text(image)
@@ -73,36 +252,31 @@ class RapidOCREngine:
 
     async def classify_invoice_type(self, image: np.ndarray) -> Dict[str, Any]:
         """分类发票类型（基于文本内容分析）"""
-        await self.initialize()
+        if not self._initialized:
+            await self.initialize()
         text_regions = await self.detect_text(image)
+        return self._classify_from_text(text_regions)
+
+    def _classify_from_text(self, text_regions: List[Dict[str, Any]], all_text: Optional[str] = None) -> Dict[str, Any]:
+        """根据已检测的文本区域分类发票类型
+        
+        Args:
+            text_regions: detect_text返回的文本区域
+            all_text: 已拼接的全部文本，为None时由text_regions拼接
+            
+        Returns:
+            分类结果
+        """
         if not text_regions:
             return {
                 "type": "unknown",
                 "confidence": 0.0,
                 "detected_keywords": []
             }
-        all_text = " ".join([region['text'] for region in text_regions])
-        invoice_type, confidence, keywords = self._classify_by_keywords(all_text)
+        if all_text is None:
+            all_text = " ".join([region['text'] for region in text_regions])
+        invoice_type, confidence, keywords, all_scores = self._classify_by_keywords(all_text)
         self.logger.info(f"发票类型分类完成: {invoice_type} (置信度: {confidence:.2f})")
-        all_scores = {}
-        for itype, config in {
-            "general_invoice": {"keywords": ["增值税普通发票", "普通发票", "发票代码", "发票号码", "开票日期"], "weight": [3, 2, 2, 2, 1]},
-            "vat_invoice": {"keywords": ["增值税专用发票", "专用发票", "纳税人识别号", "税额", "价税合计"], "weight": [5, 3, 2, 2, 2]},
-            "electronic_invoice": {"keywords": ["电子发票", "电子普通发票", "二维码", "验证码"], "weight": [4, 3, 1, 1]},
-            "receipt": {"keywords": ["收据", "收款收据", "往来款项收据", "收费收据"], "weight": [3, 2, 2, 2]},
-            "train_ticket": {"keywords": ["车票", "火车票", "高铁票", "动车票", "席别", "车次"], "weight": [3, 3, 3, 3, 2, 2]},
-            "taxi_ticket": {"keywords": ["出租车票", "的士票", "计程车", "里程", "等候时间"], "weight": [4, 3, 3, 2, 1]},
-            "air_ticket": {"keywords": ["登机牌", "机票", "航班", "座位号", "登机口"], "weight": [4, 3, 2, 1, 1]},
-            "hotel_invoice": {"keywords": ["住宿发票", "酒店发票", "宾馆", "房费", "住宿费"], "weight": [4, 3, 2, 2, 2]},
-            "catering_invoice": {"keywords": ["餐饮发票", "餐费", "服务费", "酒水", "用餐"], "weight": [3, 2, 1, 1, 1]}
-        }.items():
-            score = 0
-            for keyword, weight in zip(config["keywords"], config["weight"]):
-                if keyword in all_text:
-                    score += weight
-            if score > 0:
-                max_possible = sum(config["weight"])
-                all_scores[itype] = min(score / max_possible * 2, 1.0)
         return {
             "type": invoice_type,
             "confidence": confidence,
@@ -111,79 +285,92 @@ class RapidOCREngine:
             "all_scores": all_scores
         }
 
-    def _classify_by_keywords(self, text: str) -> Tuple[str, float, List[str]]:
-        """根据关键词分类发票类型"""
-        type_keywords = {
-            "general_invoice": ["增值税普通发票", "普通发票", "发票代码", "发票号码", "开票日期"],
-            "vat_invoice": ["增值税专用发票", "专用发票", "纳税人识别号", "税额", "价税合计"],
-            "electronic_invoice": ["电子发票", "电子普通发票", "二维码", "验证码"],
-            "receipt": ["收据", "收款收据", "往来款项收据", "收费收据"],
-            "train_ticket": ["车票", "火车票", "高铁票", "动车票", "席别", "车次"],
-            "taxi_ticket": ["出租车票", "的士票", "计程车", "里程", "等候时间"],
-            "air_ticket": ["登机牌", "机票", "航班", "座位号", "登机口"],
-            "hotel_invoice": ["住宿发票", "酒店发票", "宾馆", "房费", "住宿费"],
-            "catering_invoice": ["餐饮发票", "餐费", "服务费", "酒水", "用餐"]
-        }
+    def _classify_by_keywords(self, text: str) -> Tuple[str, float, List[str], Dict[str, float]]:
+        """根据关键词分类发票类型
+        
+        Args:
+            text: 待分类文本
+            
+        Returns:
+            (发票类型, 置信度, 命中的关键词, 各类型按权重归一化的得分)
+        """
+        found = self._find_keywords(text)
         max_type = "unknown"
         max_score = 0
         detected_keywords = []
-        for t, keywords in type_keywords.items():
+        all_scores = {}
+        for t, keywords in _TYPE_KEYWORD_TABLE:
             score = 0
-            for kw in keywords:
-                if kw in text:
+            weighted_score = 0
+            for kw, weight in keywords:
+                if kw in found:
                     score += 1
+                    weighted_score += weight
                     detected_keywords.append(kw)
             if score > max_score:
                 max_score = score
                 max_type = t
+            if weighted_score > 0:
+                all_scores[t] = min(weighted_score / _TYPE_MAX_WEIGHTS[t] * 2, 1.0)
         confidence = min(max_score / 10.0, 1.0)
-        return max_type, confidence, detected_keywords
+        return max_type, confidence, detected_keywords, all_scores
+
+    def _compile_patterns(self) -> None:
+        """编译关键信息提取用的正则表达式"""
+        self.invoice_code_pattern = re.compile(r'发票代码[：:\s]*(\d{10,12})')
+        self.invoice_number_pattern = re.compile(r'发票号码[：:\s]*(\d{8,10})')
+        self.date_patterns = [
+            re.compile(r'(\d{4}[年-]\d{1,2}[月-]\d{1,2}[日]?)'),
+            re.compile(r'(\d{4}[/-]\d{1,2}[/-]\d{1,2})'),
+            re.compile(r'开票日期[：:\s]*(\d{4}[年-]\d{1,2}[月-]\d{1,2}[日]?)')
+        ]
+        self.amount_patterns = [
+            re.compile(r'[￥¥]\s*(\d+\.?\d*)'),
+            re.compile(r'金额[：:\s]*[￥¥]?\s*(\d+\.?\d*)'),
+            re.compile(r'总额[：:\s]*[￥¥]?\s*(\d+\.?\d*)'),
+            re.compile(r'价税合计[：:\s]*[￥¥]?\s*(\d+\.?\d*)')
+        ]
+        self.tax_id_pattern = re.compile(r'纳税人识别号[：:\s]*([A-Z0-9]{15,20})')
+        self.seller_patterns = [
+            re.compile(r'销售方名称[：:\s]*([^\n\r]+)'),
+            re.compile(r'名称[：:\s]*([^\n\r]+)'),
+            re.compile(r'单位名称[：:\s]*([^\n\r]+)')
+        ]
+
+    def _find_keywords(self, text: str) -> set:
+        """找出文本中出现的全部分类关键词"""
+        if self._keyword_automaton is not None:
+            return {keyword for _, keyword in self._keyword_automaton.iter(text)}
+        return {keyword for keyword in _ALL_KEYWORDS if keyword in text}
 
     async def extract_key_information(self, text_list: List[str]) -> Dict[str, Any]:
         """基于规则提取关键信息"""
-        import re
-        text = " ".join(text_list)
+        return self._extract_by_rules(" ".join(text_list))
+
+    def _extract_by_rules(self, text: str) -> Dict[str, Any]:
+        """按规则从拼接后的文本中提取关键信息"""
         info = {}
-        invoice_code_pattern = r'发票代码[：:\s]*(\d{10,12})'
-        invoice_code_match = re.search(invoice_code_pattern, text)
+        invoice_code_match = self.invoice_code_pattern.search(text)
         if invoice_code_match:
             info['invoice_code'] = invoice_code_match.group(1)
-        invoice_number_pattern = r'发票号码[：:\s]*(\d{8,10})'
-        invoice_number_match = re.search(invoice_number_pattern, text)
+        invoice_number_match = self.invoice_number_pattern.search(text)
         if invoice_number_match:
             info['invoice_number'] = invoice_number_match.group(1)
-        date_patterns = [
-            r'(\d{4}[年-]\d{1,2}[月-]\d{1,2}[日]?)',
-            r'(\d{4}[/-]\d{1,2}[/-]\d{1,2})',
-            r'开票日期[：:\s]*(\d{4}[年-]\d{1,2}[月-]\d{1,2}[日]?)'
-        ]
-        for pattern in date_patterns:
-            date_match = re.search(pattern, text)
+        for pattern in self.date_patterns:
+            date_match = pattern.search(text)
             if date_match:
                 info['issue_date'] = date_match.group(1)
                 break
-        amount_patterns = [
-            r'[￥¥]\s*(\d+\.?\d*)',
-            r'金额[：:\s]*[￥¥]?\s*(\d+\.?\d*)',
-            r'总额[：:\s]*[￥¥]?\s*(\d+\.?\d*)',
-            r'价税合计[：:\s]*[￥¥]?\s*(\d+\.?\d*)'
-        ]
-        for pattern in amount_patterns:
-            amount_match = re.search(pattern, text)
+        for pattern in self.amount_patterns:
+            amount_match = pattern.search(text)
             if amount_match:
                 info['total_amount'] = float(amount_match.group(1))
                 break
-        tax_id_pattern = r'纳税人识别号[：:\s]*([A-Z0-9]{15,20})'
-        tax_id_match = re.search(tax_id_pattern, text)
+        tax_id_match = self.tax_id_pattern.search(text)
         if tax_id_match:
             info['tax_id'] = tax_id_match.group(1)
-        seller_patterns = [
-            r'销售方名称[：:\s]*([^\n\r]+)',
-            r'名称[：:\s]*([^\n\r]+)',
-            r'单位名称[：:\s]*([^\n\r]+)'
-        ]
-        for pattern in seller_patterns:
-            seller_match = re.search(pattern, text)
+        for pattern in self.seller_patterns:
+            seller_match = pattern.search(text)
             if seller_match:
                 info['seller_name'] = seller_match.group(1).strip()
                 break
@@ -191,11 +378,16 @@ class RapidOCREngine:
 
     async def full_ocr_pipeline(self, image: np.ndarray) -> Dict[str, Any]:
         """完整的OCR流水线处理"""
-        await self.initialize()
+        if not self._initialized:
+            await self.initialize()
+        # 统一转为连续内存，仅在需要时复制
+        image = self._ensure_contiguous(image)
+        # 只做一次检测，分类与信息提取都复用检测得到的文本
         text_regions = await self.detect_text(image)
         text_list = [region['text'] for region in text_regions]
-        classification_result = await self.classify_invoice_type(image)
-        extracted_info = await self.extract_key_information(text_list)
+        all_text = " ".join(text_list)
+        classification_result = self._classify_from_text(text_regions, all_text)
+        extracted_info = self._extract_by_rules(all_text)
         return {
             "text_regions": text_regions,
             "text_list": text_list,
@@ -205,28 +397,93 @@ class RapidOCREngine:
             "processing_engine": "RapidOCR v3.2.0"
         }
 
+    async def batch_ocr(self, images: List[np.ndarray], concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """并发执行多页图像的完整OCR流水线
+        
+        Args:
+            images: 图像列表
+            concurrency: 同时处理的最大页数，默认为配置的并行工作线程数
+            
+        Returns:
+            与输入顺序一致的流水线结果列表
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.config.processing.parallel_workers)
+        
+        async def _run_one(image: np.ndarray) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.full_ocr_pipeline(image)
+        
+        return await asyncio.gather(*[_run_one(image) for image in images])
+
     async def cleanup(self) -> None:
+        # 不等待正在执行的推理结束，Python 3.9+同时取消排队中的任务
         if self.executor:
-            self.executor.shutdown(wait=True)
+            self.executor.shutdown(wait=False, **_SHUTDOWN_KWARGS)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, **_SHUTDOWN_KWARGS)
+            self._process_pool = None
+        # RapidOCR实例由_get_rapidocr按配置缓存共享，这里只释放本引擎的引用
+        self._engine = None
+        self._initialized = False
+        self._det_cache.clear()
         self.logger.info("RapidOCR v3.2.0引擎清理完成")
 
+    @staticmethod
+    def _ensure_contiguous(image: np.ndarray) -> np.ndarray:
+        """确保图像为C连续内存，仅在需要时复制
+        
+        灰度及四通道图像由RapidOCR在加载时自行转换为三通道，此处不做处理。
+        """
+        if not image.flags['C_CONTIGUOUS']:
+            image = np.ascontiguousarray(image)
+        return image
+
+    @staticmethod
+    def _decode_image_bytes(image_bytes: Any) -> np.ndarray:
+        """用cv2.imdecode将编码后的图像数据直接解码为BGR数组（RapidOCR的输入格式）"""
+        image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("无法解码图像数据")
+        return image
+
+    @staticmethod
+    def _read_image_file(file_path: str) -> Optional[np.ndarray]:
+        """通过内存映射读取图像文件并直接解码，省去整体读入的字节副本
+        
+        Args:
+            file_path: 图像文件路径
+            
+        Returns:
+            BGR图像数组；文件不存在或无法解码时返回None，与cv2.imread一致
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return cv2.imdecode(np.frombuffer(mm, dtype=np.uint8), cv2.IMREAD_COLOR)
+        except (OSError, ValueError):
+            # 文件不存在、无权限或为空文件（无法映射）
+            return None
+
     @staticmethod
     def preprocess_image(image_data: Any) -> np.ndarray:
-        """预处理图像数据"""
+        """预处理图像数据
+        
+        Args:
+            image_data: base64字符串、文件路径、图像数组或文件对象
+            
+        Returns:
+            BGR图像数组
+        """
         if isinstance(image_data, str):
             if image_data.startswith('data:image') or len(image_data) > 100:
                 if image_data.startswith('data:image'):
                     image_data = image_data.split(',')[1]
-                image_bytes = base64.b64decode(image_data)
-                image = Image.open(BytesIO(image_bytes))
-                return np.array(image)
+                return RapidOCREngine._decode_image_bytes(base64.b64decode(image_data))
             else:
-                return cv2.imread(image_data)
+                return RapidOCREngine._read_image_file(image_data)
         elif isinstance(image_data, np.ndarray):
             return image_data
         elif hasattr(image_data, 'read'):
-            image_bytes = image_data.read()
-            image = Image.open(BytesIO(image_bytes))
-            return np.array(image)
+            return RapidOCREngine._decode_image_bytes(image_data.read())
         else:
             raise ValueError(f"不支持的图像数据类型: {type(image_data)}") 
\ No newline at end of file
@@ -4,18 +4,54 @@
 提供通用的工具函数，包括日志设置、错误处理、格式化等
 """
 
+import atexit
 import logging
 import logging.handlers
+import mmap
+import queue
+import re
 import sys
 import time
 import traceback
 import json
-from typing import Any, Dict, List, Optional, Union
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 from pathlib import Path
 import uuid
 import hashlib
 import os
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# sanitize_filename中合并连续下划线
+_RE_UNDERSCORES = re.compile(r'_{2,}')
+
+# get_dynamic_system_info的缓存：(采集时间, 动态系统信息)，有效期为_SYSTEM_INFO_TTL秒
+_SYSTEM_INFO_TTL = 1.0
+_system_info_cache: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)
+
+# setup_logging读取的日志配置项及其默认值
+_LOGGING_DEFAULTS = {
+    'log_dir': './logs',
+    'level': 'INFO',
+    'format': 'detailed',
+    'enable_file_logging': True,
+    'log_file': 'server.log',
+    'log_max_size': 100 * 1024 * 1024,  # 字节
+    'log_backup_count': 10,
+    'enable_error_logging': True,
+    'error_log_file': 'error.log',
+}
+
+# 已创建过的日志目录，重复初始化日志时不再访问文件系统
+_created_log_dirs = set()
+
+# 后台写日志的队列监听器，进程内只保留最近一次setup_logging创建的一个
+_log_listener: Optional["BatchingQueueListener"] = None
+
 
 def setup_logging(config: Any) -> logging.Logger:
     """设置日志系统
@@ -26,13 +62,20 @@ def setup_logging(config: Any) -> logging.Logger:
     Returns:
         配置好的logger
     """
+    global _log_listener
+    
+    # 一次性读取全部日志配置项
+    log_config = {key: getattr(config.logging, key, default) for key, default in _LOGGING_DEFAULTS.items()}
+    
     # 创建日志目录
-    log_dir = Path(getattr(config.logging, 'log_dir', './logs'))
-    log_dir.mkdir(parents=True, exist_ok=True)
+    log_dir = Path(log_config['log_dir'])
+    if log_dir not in _created_log_dirs:
+        log_dir.mkdir(parents=True, exist_ok=True)
+        _created_log_dirs.add(log_dir)
     
     # 获取配置参数
-    log_level = getattr(config.logging, 'level', 'INFO').upper()
-    log_format = getattr(config.logging, 'format', 'detailed')
+    log_level = log_config['level'].upper()
+    log_format = log_config['format']
     
     # 定义日志格式
     if log_format == 'simple':
@@ -51,23 +94,30 @@ def setup_logging(config: Any) -> logging.Logger:
     logger = logging.getLogger('invoice_ocr_mcp')
     logger.setLevel(getattr(logging, log_level, logging.INFO))
     
-    # 清除现有处理器
+    # 清除现有处理器，并停止上一次配置的后台写日志线程
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+    shutdown_logging()
     
     # 控制台处理器
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
     console_handler.setLevel(getattr(logging, log_level, logging.INFO))
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
+    
+    # 结构化日志直接以字节写入文件，省去str与UTF-8之间的往返编码
+    if isinstance(formatter, StructuredFormatter):
+        file_handler_class = BytesRotatingFileHandler
+    else:
+        file_handler_class = logging.handlers.RotatingFileHandler
     
     # 文件处理器
-    if getattr(config.logging, 'enable_file_logging', True):
-        file_path = log_dir / getattr(config.logging, 'log_file', 'server.log')
-        max_size = getattr(config.logging, 'log_max_size', 100 * 1024 * 1024)  # 字节
-        backup_count = getattr(config.logging, 'log_backup_count', 10)
+    if log_config['enable_file_logging']:
+        file_path = log_dir / log_config['log_file']
+        max_size = log_config['log_max_size']
+        backup_count = log_config['log_backup_count']
         
-        file_handler = logging.handlers.RotatingFileHandler(
+        file_handler = file_handler_class(
             file_path,
             maxBytes=max_size,
             backupCount=backup_count,
@@ -75,12 +125,12 @@ def setup_logging(config: Any) -> logging.Logger:
         )
         file_handler.setFormatter(formatter)
         file_handler.setLevel(getattr(logging, log_level, logging.INFO))
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     
     # 错误日志处理器
-    if getattr(config.logging, 'enable_error_logging', True):
-        error_file = log_dir / getattr(config.logging, 'error_log_file', 'error.log')
-        error_handler = logging.handlers.RotatingFileHandler(
+    if log_config['enable_error_logging']:
+        error_file = log_dir / log_config['error_log_file']
+        error_handler = file_handler_class(
             error_file,
             maxBytes=50 * 1024 * 1024,  # 50MB
             backupCount=5,
@@ -88,16 +138,113 @@ def setup_logging(config: Any) -> logging.Logger:
         )
         error_handler.setFormatter(formatter)
         error_handler.setLevel(logging.ERROR)
-        logger.addHandler(error_handler)
+        handlers.append(error_handler)
+    
+    # 调用方只把日志记录放入队列，由后台线程完成格式化和磁盘写入
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(LocalQueueHandler(log_queue))
+    _log_listener = BatchingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
     
     logger.info(f"日志系统初始化完成，级别: {log_level}")
     return logger
 
 
+def shutdown_logging() -> None:
+    """停止后台写日志线程，写完队列中剩余的记录后关闭各处理器"""
+    global _log_listener
+    
+    if _log_listener is None:
+        return
+    
+    listener, _log_listener = _log_listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+# 解释器退出前写完队列中的日志
+atexit.register(shutdown_logging)
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """进程内日志队列处理器
+    
+    记录只在本进程的线程间传递，无需像默认实现那样预先格式化整条日志并剥离异常信息，
+    只合并消息参数，格式化（含结构化日志的异常字段）留给后台线程完成。
+    """
+    
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """批量处理日志记录的队列监听器
+    
+    后台线程取到一条记录后，继续无阻塞地取出队列中已积压的记录（最多max_batch条）一并处理；
+    支持emit_batch的处理器整批只写入、刷新一次，其余处理器逐条处理。
+    """
+    
+    max_batch = 256
+    
+    def _monitor(self):
+        q = self.queue
+        has_task_done = hasattr(q, 'task_done')
+        stopped = False
+        while not stopped:
+            batch = []
+            record = self.dequeue(True)
+            # 队列已空时立即写出，不为凑批次而等待
+            while record is not self._sentinel:
+                batch.append(record)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    record = self.dequeue(False)
+                except queue.Empty:
+                    break
+            else:
+                stopped = True
+            if batch:
+                self.handle_batch(batch)
+            if has_task_done:
+                for _ in range(len(batch) + stopped):
+                    q.task_done()
+    
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        """把一批日志记录交给各处理器
+        
+        Args:
+            records: 日志记录列表
+        """
+        records = [self.prepare(record) for record in records]
+        for handler in self.handlers:
+            if not hasattr(handler, 'emit_batch'):
+                for record in records:
+                    if not self.respect_handler_level or record.levelno >= handler.level:
+                        handler.handle(record)
+                continue
+            
+            accepted = [
+                record for record in records
+                if (not self.respect_handler_level or record.levelno >= handler.level)
+                and handler.filter(record)
+            ]
+            if accepted:
+                handler.acquire()
+                try:
+                    handler.emit_batch(accepted)
+                finally:
+                    handler.release()
+
+
 class StructuredFormatter(logging.Formatter):
     """结构化日志格式器"""
     
-    def format(self, record):
+    def _build_log_data(self, record: logging.LogRecord) -> Dict[str, Any]:
+        """构建单条日志记录的结构化字段"""
         log_data = {
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.created)),
             'level': record.levelname,
@@ -119,7 +266,76 @@ class StructuredFormatter(logging.Formatter):
         if hasattr(record, 'user_id'):
             log_data['user_id'] = record.user_id
         
+        return log_data
+    
+    def format(self, record):
+        log_data = self._build_log_data(record)
+        if orjson is not None:
+            # 额外字段可能不是JSON原生类型，统一转为字符串
+            return orjson.dumps(log_data, default=str).decode('utf-8')
         return json.dumps(log_data, ensure_ascii=False)
+    
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        """将日志记录格式化为UTF-8编码的JSON字节串
+        
+        Args:
+            record: 日志记录
+            
+        Returns:
+            JSON字节串
+        """
+        log_data = self._build_log_data(record)
+        if orjson is not None:
+            return orjson.dumps(log_data, default=str)
+        return json.dumps(log_data, ensure_ascii=False).encode('utf-8')
+
+
+class BytesRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """以二进制模式写入结构化日志的滚动文件处理器
+    
+    直接写入StructuredFormatter.format_bytes的结果，省去格式化成str后再编码的开销。
+    """
+    
+    def _open(self):
+        return open(self.baseFilename, 'ab')
+    
+    def emit(self, record):
+        try:
+            data = self.formatter.format_bytes(record) + b'\n'
+            if self.stream is None:
+                self.stream = self._open()
+            # 用已编码的长度判断是否需要滚动，避免父类为此再格式化一次
+            if self.maxBytes > 0 and self.stream.tell() + len(data) >= self.maxBytes:
+                self.doRollover()
+            self.stream.write(data)
+            self.stream.flush()
+        except Exception:
+            self.handleError(record)
+    
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        """批量写入日志记录，整批只调用一次writelines和flush（需要滚动时先写出已缓冲部分）
+        
+        Args:
+            records: 已通过级别和过滤器检查的日志记录
+        """
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            position = self.stream.tell()
+            buffered = []
+            for record in records:
+                data = self.formatter.format_bytes(record) + b'\n'
+                if self.maxBytes > 0 and position + len(data) >= self.maxBytes:
+                    self.stream.writelines(buffered)
+                    buffered = []
+                    self.doRollover()
+                    position = self.stream.tell()
+                buffered.append(data)
+                position += len(data)
+            self.stream.writelines(buffered)
+            self.stream.flush()
+        except Exception:
+            self.handleError(records[-1])
 
 
 def format_error_response(error_code: str, 
@@ -176,6 +392,45 @@ def format_success_response(data: Any,
     return response
 
 
+def format_error_response_bytes(error_code: str,
+                               error_message: str,
+                               details: Optional[Dict[str, Any]] = None) -> bytes:
+    """格式化错误响应并直接序列化为UTF-8编码的JSON字节串
+    
+    Args:
+        error_code: 错误代码
+        error_message: 错误消息
+        details: 额外的错误详情
+        
+    Returns:
+        JSON字节串
+    """
+    return _dumps_response(format_error_response(error_code, error_message, details))
+
+
+def format_success_response_bytes(data: Any,
+                                 message: str = "操作成功",
+                                 meta: Optional[Dict[str, Any]] = None) -> bytes:
+    """格式化成功响应并直接序列化为UTF-8编码的JSON字节串
+    
+    Args:
+        data: 响应数据
+        message: 成功消息
+        meta: 元数据
+        
+    Returns:
+        JSON字节串
+    """
+    return _dumps_response(format_success_response(data, message, meta))
+
+
+def _dumps_response(response: Dict[str, Any]) -> bytes:
+    """把响应字典序列化为JSON字节串，无法序列化的值转为字符串"""
+    if orjson is not None:
+        return orjson.dumps(response, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(response, ensure_ascii=False, default=str).encode('utf-8')
+
+
 def generate_request_id() -> str:
     """生成请求ID
     
@@ -188,6 +443,9 @@ def generate_request_id() -> str:
 def calculate_file_hash(file_path: Union[str, Path], algorithm: str = 'md5') -> str:
     """计算文件哈希值
     
+    同一文件在校验、分类、提取等环节会被重复计算哈希，结果按文件路径、inode、大小和
+    修改时间缓存，文件被修改或替换后缓存键随之变化，自动重新计算。
+    
     Args:
         file_path: 文件路径
         algorithm: 哈希算法 (md5, sha1, sha256)
@@ -195,11 +453,25 @@ def calculate_file_hash(file_path: Union[str, Path], algorithm: str = 'md5') ->
     Returns:
         文件哈希值
     """
-    hash_algo = hashlib.new(algorithm)
-    
+    stat = os.stat(file_path)
+    return _cached_file_hash(os.fspath(file_path), stat.st_ino, stat.st_size, stat.st_mtime_ns, algorithm)
+
+
+@lru_cache(maxsize=1024)
+def _cached_file_hash(file_path: str, inode: int, size: int, mtime_ns: int, algorithm: str) -> str:
+    """实际读取文件计算哈希值，inode、size和mtime_ns只作为缓存键"""
     with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_algo.update(chunk)
+        # Python 3.11+：由C代码循环读取并计算，不经过Python层的分块循环
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, algorithm).hexdigest()
+        
+        # 旧版本：内存映射整个文件，一次update完成计算（空文件无法映射，直接跳过）
+        hash_algo = hashlib.new(algorithm)
+        if os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                hash_algo.update(mm)
     
     return hash_algo.hexdigest()
 
@@ -248,17 +520,19 @@ def timing_decorator(logger: Optional[logging.Logger] = None):
     """
     def decorator(func):
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            # perf_counter_ns单调递增，不受系统时间调整影响
+            start_time = time.perf_counter_ns()
             try:
                 result = func(*args, **kwargs)
-                execution_time = time.time() - start_time
                 
-                if logger:
+                # 未开启DEBUG级别时不计算耗时、不构建日志字符串
+                if logger and logger.isEnabledFor(logging.DEBUG):
+                    execution_time = (time.perf_counter_ns() - start_time) * 1e-9
                     logger.debug(f"{func.__name__} 执行时间: {execution_time:.3f}秒")
                 
                 return result
             except Exception as e:
-                execution_time = time.time() - start_time
+                execution_time = (time.perf_counter_ns() - start_time) * 1e-9
                 if logger:
                     logger.error(f"{func.__name__} 执行失败，耗时: {execution_time:.3f}秒，错误: {str(e)}")
                 raise
@@ -278,17 +552,19 @@ def async_timing_decorator(logger: Optional[logging.Logger] = None):
     """
     def decorator(func):
         async def wrapper(*args, **kwargs):
-            start_time = time.time()
+            # perf_counter_ns单调递增，不受系统时间调整影响
+            start_time = time.perf_counter_ns()
             try:
                 result = await func(*args, **kwargs)
-                execution_time = time.time() - start_time
                 
-                if logger:
+                # 未开启DEBUG级别时不计算耗时、不构建日志字符串
+                if logger and logger.isEnabledFor(logging.DEBUG):
+                    execution_time = (time.perf_counter_ns() - start_time) * 1e-9
                     logger.debug(f"{func.__name__} 执行时间: {execution_time:.3f}秒")
                 
                 return result
             except Exception as e:
-                execution_time = time.time() - start_time
+                execution_time = (time.perf_counter_ns() - start_time) * 1e-9
                 if logger:
                     logger.error(f"{func.__name__} 执行失败，耗时: {execution_time:.3f}秒，错误: {str(e)}")
                 raise
@@ -327,9 +603,8 @@ def sanitize_filename(filename: str) -> str:
     for char in illegal_chars:
         filename = filename.replace(char, '_')
     
-    # 移除连续的下划线
-    while '__' in filename:
-        filename = filename.replace('__', '_')
+    # 合并连续的下划线（单次线性扫描）
+    filename = _RE_UNDERSCORES.sub('_', filename)
     
     # 去除首尾下划线
     filename = filename.strip('_')
@@ -369,34 +644,75 @@ def create_directory_if_not_exists(directory: Union[str, Path]) -> None:
 def get_system_info() -> Dict[str, Any]:
     """获取系统信息
     
+    合并静态信息与动态信息，只需要平台信息的调用方可直接使用get_static_system_info。
+    
     Returns:
         系统信息字典
     """
+    system_info = get_static_system_info()
+    system_info.update(get_dynamic_system_info())
+    return system_info
+
+
+def get_static_system_info() -> Dict[str, Any]:
+    """获取运行期间不变的系统信息（平台、Python版本、CPU核数）
+    
+    Returns:
+        静态系统信息字典
+    """
+    return dict(_collect_static_system_info())
+
+
+@lru_cache(maxsize=1)
+def _collect_static_system_info() -> Dict[str, Any]:
+    """采集静态系统信息，进程内只执行一次"""
     import platform
-    import psutil
     
+    return {
+        "platform": platform.platform(),
+        "python_version": platform.python_version(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def get_dynamic_system_info() -> Dict[str, Any]:
+    """获取内存和磁盘使用情况
+    
+    结果缓存1秒，状态接口被频繁轮询时不会每次都读取/proc和磁盘统计。
+    
+    Returns:
+        动态系统信息字典，未安装psutil时为空字典
+    """
+    global _system_info_cache
+    
+    now = time.monotonic()
+    cached_at, cached_info = _system_info_cache
+    if cached_info is not None and now - cached_at < _SYSTEM_INFO_TTL:
+        return dict(cached_info)
+    
+    system_info = _collect_dynamic_system_info()
+    _system_info_cache = (now, system_info)
+    return dict(system_info)
+
+
+def _collect_dynamic_system_info() -> Dict[str, Any]:
+    """采集内存和磁盘使用情况"""
     try:
-        cpu_count = os.cpu_count()
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        return {
-            "platform": platform.platform(),
-            "python_version": platform.python_version(),
-            "cpu_count": cpu_count,
-            "memory_total_gb": round(memory.total / (1024**3), 2),
-            "memory_available_gb": round(memory.available / (1024**3), 2),
-            "memory_percent": memory.percent,
-            "disk_total_gb": round(disk.total / (1024**3), 2),
-            "disk_free_gb": round(disk.free / (1024**3), 2),
-            "disk_percent": round((disk.used / disk.total) * 100, 2)
-        }
+        import psutil
     except ImportError:
-        return {
-            "platform": platform.platform(),
-            "python_version": platform.python_version(),
-            "cpu_count": os.cpu_count()
-        }
+        return {}
+    
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+    
+    return {
+        "memory_total_gb": round(memory.total / (1024**3), 2),
+        "memory_available_gb": round(memory.available / (1024**3), 2),
+        "memory_percent": memory.percent,
+        "disk_total_gb": round(disk.total / (1024**3), 2),
+        "disk_free_gb": round(disk.free / (1024**3), 2),
+        "disk_percent": round((disk.used / disk.total) * 100, 2)
+    }
 
 
 def retry_on_exception(max_retries: int = 3, 
@@ -14,6 +14,50 @@ from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
 
+# 导入时加载MIME类型数据库，避免首次验证URL时才读取系统配置文件
+mimetypes.init()
+
+# 预编译的正则表达式，避免每次验证都经过re模块的模式缓存查找
+# 统一社会信用代码（18位）与纳税人识别号（15位）
+_RE_TAX_ID_18 = re.compile(r'^[0-9A-HJ-NPQRTUWXY]{2}\d{6}[0-9A-HJ-NPQRTUWXY]{10}$')
+_RE_TAX_ID_15 = re.compile(r'^[0-9A-Z]{15}$')
+_RE_AMOUNT = re.compile(r'\d+(?:\.\d{0,2})?|\.\d{1,2}')
+_RE_PHONE_STRIP = re.compile(r'[\s\-()]')
+_RE_MOBILE = re.compile(r'^1[3-9]\d{9}$')
+_RE_LANDLINES = (
+    re.compile(r'^0\d{2,3}\d{7,8}$'),  # 区号+号码
+    re.compile(r'^\d{3,4}\d{7,8}$'),   # 简化格式
+)
+_RE_DATES = (
+    re.compile(r'^\d{4}-\d{2}-\d{2}$'),  # YYYY-MM-DD
+    re.compile(r'^\d{4}/\d{2}/\d{2}$'),  # YYYY/MM/DD
+    re.compile(r'^\d{4}年\d{1,2}月\d{1,2}日$'),  # YYYY年MM月DD日
+    re.compile(r'^\d{4}\.\d{2}\.\d{2}$'),  # YYYY.MM.DD
+)
+
+# 图像文件头
+_IMAGE_HEADERS = (
+    b'\xFF\xD8\xFF',  # JPEG
+    b'\x89PNG\r\n\x1a\n',  # PNG
+    b'GIF87a',  # GIF87a
+    b'GIF89a',  # GIF89a
+    b'BM',  # BMP
+    b'II*\x00',  # TIFF (little endian)
+    b'MM\x00*',  # TIFF (big endian)
+    b'RIFF',  # WebP (需要进一步检查)
+)
+
+# 支持的图像文件扩展名
+_SUPPORTED_IMAGE_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp',
+    '.tiff', '.tif', '.webp', '.svg'
+})
+
+_RE_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+
+# Base64字母表，配合bytes.translate在C层一次扫描完成字符集校验
+_BASE64_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
 
 def validate_image_data(image_data: str) -> bool:
     """验证Base64图像数据格式
@@ -34,32 +78,33 @@ def validate_image_data(image_data: str) -> bool:
                 return False
             image_data = image_data.split(',')[1]
         
-        # 验证Base64格式
-        if not re.match(r'^[A-Za-z0-9+/]*={0,2}$', image_data):
+        # 允许单个结尾换行（b64decode解码时会忽略它）
+        if image_data.endswith('\n'):
+            image_data = image_data[:-1]
+        
+        # 验证Base64格式：末尾最多2个填充符，其余字符删除字母表字符后应为空，
+        # bytes.translate在C层一次扫描完成字符集校验
+        stripped = image_data.rstrip('=')
+        data_length = len(stripped)
+        if (len(image_data) - data_length > 2 or not stripped.isascii()
+                or stripped.encode('ascii').translate(None, _BASE64_ALPHABET)):
             return False
         
-        # 尝试解码
-        decoded = base64.b64decode(image_data)
+        # 按b64decode的规则检查填充：余1个字符无法解码，余2、3个字符时需补足填充
+        remainder = data_length % 4
+        if remainder == 1 or (remainder and len(image_data) - data_length < 4 - remainder):
+            return False
         
-        # 检查最小大小（至少1KB）
-        if len(decoded) < 1024:
+        # 由编码长度推算解码后的大小，检查最小大小（至少1KB），无需解码整个图像
+        if data_length * 3 // 4 < 1024:
             return False
         
-        # 检查文件头是否为图像格式
-        image_headers = [
-            b'\xFF\xD8\xFF',  # JPEG
-            b'\x89PNG\r\n\x1a\n',  # PNG
-            b'GIF87a',  # GIF87a
-            b'GIF89a',  # GIF89a
-            b'BM',  # BMP
-            b'II*\x00',  # TIFF (little endian)
-            b'MM\x00*',  # TIFF (big endian)
-            b'RIFF',  # WebP (需要进一步检查)
-        ]
-        
-        for header in image_headers:
-            if decoded.startswith(header):
-                return True
+        # 只解码开头16个字符（12字节）用于识别文件头
+        decoded = base64.b64decode(image_data[:16])
+        
+        # 检查文件头是否为图像格式（bytes.startswith接受元组，在C层一次比较全部文件头）
+        if decoded.startswith(_IMAGE_HEADERS):
+            return True
         
         # 特殊处理WebP
         if decoded.startswith(b'RIFF') and b'WEBP' in decoded[:12]:
@@ -94,25 +139,19 @@ def validate_image_url(image_url: str) -> bool:
         if parsed.scheme not in ['http', 'https']:
             return False
         
-        # 文件扩展名验证
-        supported_extensions = {
-            '.jpg', '.jpeg', '.png', '.gif', '.bmp', 
-            '.tiff', '.tif', '.webp', '.svg'
-        }
-        
-        # 从URL路径中提取扩展名
+        # 文件扩展名验证：取最后一个点之后的后缀，一次集合查找
         path = parsed.path.lower()
-        for ext in supported_extensions:
-            if path.endswith(ext):
-                return True
+        dot_index = path.rfind('.')
+        if dot_index >= 0 and path[dot_index:] in _SUPPORTED_IMAGE_EXTENSIONS:
+            return True
         
-        # 如果没有明确的扩展名，尝试从MIME类型推断
-        mime_type, _ = mimetypes.guess_type(image_url)
-        if mime_type and mime_type.startswith('image/'):
+        # 允许无扩展名的URL（可能是动态生成的图片），此时无需查询MIME类型
+        if '.' not in path[path.rfind('/') + 1:]:
             return True
         
-        # 允许无扩展名的URL（可能是动态生成的图片）
-        if '.' not in path.split('/')[-1]:
+        # 扩展名不在支持列表中时，尝试从MIME类型推断
+        mime_type, _ = mimetypes.guess_type(image_url)
+        if mime_type and mime_type.startswith('image/'):
             return True
         
         return False
@@ -122,11 +161,12 @@ def validate_image_url(image_url: str) -> bool:
         return False
 
 
-def validate_batch_input(images: List[Dict[str, Any]]) -> Dict[str, Any]:
+def validate_batch_input(images: List[Dict[str, Any]], fail_fast: bool = False) -> Dict[str, Any]:
     """验证批量输入数据
     
     Args:
         images: 图像列表
+        fail_fast: 为True时遇到第一个无效项即返回，不再验证其余图像
         
     Returns:
         验证结果 {"valid": bool, "error": str, "details": dict}
@@ -154,22 +194,31 @@ def validate_batch_input(images: List[Dict[str, Any]]) -> Dict[str, Any]:
         }
     
     # 验证每个图像项
+    invalid_items = []
     validation_details = {
         "total_count": len(images),
         "valid_count": 0,
-        "invalid_items": []
+        "invalid_items": invalid_items
     }
     
+    # 循环内使用局部引用，省去每项的全局查找和属性查找
+    add_invalid = invalid_items.append
+    check_image_data = validate_image_data
+    check_image_url = validate_image_url
+    valid_count = 0
+    
     for i, image_item in enumerate(images):
         item_errors = []
         
         # 检查是否为字典
         if not isinstance(image_item, dict):
             item_errors.append(f"第{i+1}项不是字典格式")
-            validation_details["invalid_items"].append({
+            add_invalid({
                 "index": i,
                 "errors": item_errors
             })
+            if fail_fast:
+                break
             continue
         
         # 检查必需字段
@@ -186,26 +235,30 @@ def validate_batch_input(images: List[Dict[str, Any]]) -> Dict[str, Any]:
         
         # 验证图像数据
         if "image_data" in image_item:
-            if not validate_image_data(image_item["image_data"]):
+            if not check_image_data(image_item["image_data"]):
                 item_errors.append("image_data格式无效")
         
         # 验证图像URL
         if "image_url" in image_item:
-            if not validate_image_url(image_item["image_url"]):
+            if not check_image_url(image_item["image_url"]):
                 item_errors.append("image_url格式无效")
         
         # 记录验证结果
         if item_errors:
-            validation_details["invalid_items"].append({
+            add_invalid({
                 "index": i,
                 "id": image_item.get("id", f"item_{i}"),
                 "errors": item_errors
             })
+            if fail_fast:
+                break
         else:
-            validation_details["valid_count"] += 1
+            valid_count += 1
+    
+    validation_details["valid_count"] = valid_count
     
     # 最终验证结果
-    is_valid = len(validation_details["invalid_items"]) == 0
+    is_valid = not invalid_items
     
     if is_valid:
         return {
@@ -214,7 +267,7 @@ def validate_batch_input(images: List[Dict[str, Any]]) -> Dict[str, Any]:
             "details": validation_details
         }
     else:
-        error_summary = f"发现{len(validation_details['invalid_items'])}个无效项"
+        error_summary = f"发现{len(invalid_items)}个无效项"
         return {
             "valid": False,
             "error": error_summary,
@@ -263,27 +316,11 @@ def validate_amount(amount_str: str) -> bool:
     if not amount_str or not isinstance(amount_str, str):
         return False
     
-    try:
-        # 移除货币符号和空格
-        cleaned = amount_str.replace('￥', '').replace('¥', '').replace(',', '').strip()
-        
-        # 验证数字格式
-        amount = float(cleaned)
-        
-        # 检查是否为非负数
-        if amount < 0:
-            return False
-        
-        # 检查小数位数（最多2位）
-        if '.' in cleaned:
-            decimal_places = len(cleaned.split('.')[1])
-            if decimal_places > 2:
-                return False
-        
-        return True
-        
-    except (ValueError, IndexError):
-        return False
+    # 移除货币符号、千位分隔符和首尾空格
+    cleaned = amount_str.replace('￥', '').replace('¥', '').replace(',', '').strip()
+    
+    # 非负数且最多2位小数；不接受正负号、科学计数法以及inf/nan
+    return _RE_AMOUNT.fullmatch(cleaned) is not None
 
 
 def validate_tax_id(tax_id: str) -> bool:
@@ -300,11 +337,11 @@ def validate_tax_id(tax_id: str) -> bool:
     
     # 统一社会信用代码（18位）
     if len(tax_id) == 18:
-        return re.match(r'^[0-9A-HJ-NPQRTUWXY]{2}\d{6}[0-9A-HJ-NPQRTUWXY]{10}$', tax_id) is not None
+        return _RE_TAX_ID_18.match(tax_id) is not None
     
     # 纳税人识别号（15位）
     elif len(tax_id) == 15:
-        return re.match(r'^[0-9A-Z]{15}$', tax_id) is not None
+        return _RE_TAX_ID_15.match(tax_id) is not None
     
     return False
 
@@ -322,24 +359,15 @@ def validate_phone_number(phone: str) -> bool:
         return False
     
     # 移除空格和特殊字符
-    cleaned = re.sub(r'[\s\-()]', '', phone)
-    
-    # 手机号码格式
-    mobile_pattern = r'^1[3-9]\d{9}$'
-    
-    # 固定电话格式
-    landline_patterns = [
-        r'^0\d{2,3}\d{7,8}$',  # 区号+号码
-        r'^\d{3,4}\d{7,8}$',   # 简化格式
-    ]
+    cleaned = _RE_PHONE_STRIP.sub('', phone)
     
     # 检查手机号
-    if re.match(mobile_pattern, cleaned):
+    if _RE_MOBILE.match(cleaned):
         return True
     
     # 检查固定电话
-    for pattern in landline_patterns:
-        if re.match(pattern, cleaned):
+    for pattern in _RE_LANDLINES:
+        if pattern.match(cleaned):
             return True
     
     return False
@@ -357,16 +385,9 @@ def validate_date_string(date_str: str) -> bool:
     if not date_str or not isinstance(date_str, str):
         return False
     
-    # 支持的日期格式
-    date_patterns = [
-        r'^\d{4}-\d{2}-\d{2}$',  # YYYY-MM-DD
-        r'^\d{4}/\d{2}/\d{2}$',  # YYYY/MM/DD
-        r'^\d{4}年\d{1,2}月\d{1,2}日$',  # YYYY年MM月DD日
-        r'^\d{4}\.\d{2}\.\d{2}$',  # YYYY.MM.DD
-    ]
-    
-    for pattern in date_patterns:
-        if re.match(pattern, date_str):
+    # 支持的日期格式见_RE_DATES
+    for pattern in _RE_DATES:
+        if pattern.match(date_str):
             return True
     
     return False
@@ -386,13 +407,10 @@ def sanitize_text(text: str, max_length: int = 1000) -> str:
         return ""
     
     # 移除控制字符和特殊空白字符
-    cleaned = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
-    
-    # 规范化空白字符
-    cleaned = re.sub(r'\s+', ' ', cleaned)
+    cleaned = _RE_CONTROL_CHARS.sub('', text)
     
-    # 去除首尾空白
-    cleaned = cleaned.strip()
+    # 规范化空白字符并去除首尾空白：str.split()按与\s相同的Unicode空白拆分并合并连续空白
+    cleaned = ' '.join(cleaned.split())
     
     # 限制长度
     if len(cleaned) > max_length:
@@ -5,9 +5,14 @@ MCP服务器主文件，实现发票OCR识别的MCP协议接口
 """
 
 import asyncio
+import copy
+import hashlib
 import logging
 import sys
-from typing import Any, Dict, List, Optional
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
@@ -41,6 +46,17 @@ class InvoiceOCRServer:
         self.image_processor = ImageProcessor(self.config)
         self.batch_processor = BatchProcessor(self.config)
         
+        # 识别结果缓存：Base64图像数据摘要 -> (写入时间, 结果)，按LRU淘汰；
+        # URL请求不缓存，同一URL下的图像内容可能发生变化
+        self._result_cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._result_cache_size = self.config.processing.result_cache_size
+        # 相同图像的并发请求共用一把锁，只由第一个请求执行识别
+        self._result_cache_locks: "weakref.WeakValueDictionary[bytes, asyncio.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
         # 注册MCP工具
         self._register_handlers()
         
@@ -73,6 +89,11 @@ class InvoiceOCRServer:
                                 "enum": ["standard", "detailed", "raw"],
                                 "default": "standard",
                                 "description": "输出格式：标准/详细/原始"
+                            },
+                            "no_cache": {
+                                "type": "boolean",
+                                "default": False,
+                                "description": "跳过识别结果缓存，强制重新识别"
                             }
                         },
                         "oneOf": [
@@ -135,6 +156,14 @@ class InvoiceOCRServer:
                             {"required": ["image_url"]}
                         ]
                     }
+                ),
+                Tool(
+                    name="cache_stats",
+                    description="查询识别结果缓存统计信息",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {}
+                    }
                 )
             ]
         
@@ -149,6 +178,8 @@ class InvoiceOCRServer:
                     result = await self._recognize_batch_invoices(arguments)
                 elif name == "detect_invoice_type":
                     result = await self._detect_invoice_type(arguments)
+                elif name == "cache_stats":
+                    result = self._get_cache_stats()
                 else:
                     raise ValueError(f"未知的工具: {name}")
                 
@@ -179,6 +210,103 @@ class InvoiceOCRServer:
                 "必须提供 image_data 或 image_url 之一"
             )
         
+        use_cache = (
+            image_data
+            and self.config.processing.enable_cache
+            and self._result_cache_size > 0
+            and not arguments.get("no_cache", False)
+        )
+        if not use_cache:
+            return await self._run_single_recognition(image_data, image_url, output_format)
+        
+        # 重复提交的相同图像直接返回缓存结果
+        cache_key = self._make_result_cache_key(image_data, output_format)
+        cached = self._get_cached_result(cache_key)
+        if cached is not None:
+            return cached
+        
+        # 相同图像的并发请求等待第一个请求完成后读取缓存，避免重复识别
+        lock = self._result_cache_locks.get(cache_key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._result_cache_locks[cache_key] = lock
+        
+        async with lock:
+            cached = self._get_cached_result(cache_key)
+            if cached is not None:
+                return cached
+            
+            self._cache_misses += 1
+            result = await self._run_single_recognition(image_data, image_url, output_format)
+            
+            # 只缓存识别成功的结果
+            if result.get("success"):
+                self._result_cache[cache_key] = (time.monotonic(), copy.deepcopy(result))
+                if len(self._result_cache) > self._result_cache_size:
+                    self._result_cache.popitem(last=False)
+            
+            return result
+    
+    def _make_result_cache_key(self, image_data: str, output_format: str) -> bytes:
+        """根据图像内容和输出格式生成识别结果缓存键
+        
+        Args:
+            image_data: Base64编码的图像数据
+            output_format: 输出格式
+            
+        Returns:
+            16字节的blake2b摘要
+        """
+        digest = hashlib.blake2b(output_format.encode('utf-8'), digest_size=16)
+        digest.update(b'\x00')
+        digest.update(image_data.encode('utf-8'))
+        return digest.digest()
+    
+    def _get_cached_result(self, cache_key: bytes) -> Optional[Dict[str, Any]]:
+        """读取未过期的缓存结果
+        
+        Args:
+            cache_key: 缓存键
+            
+        Returns:
+            缓存结果的独立副本，未命中时返回None
+        """
+        entry = self._result_cache.get(cache_key)
+        if entry is None:
+            return None
+        
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.config.processing.cache_expire_time:
+            del self._result_cache[cache_key]
+            return None
+        
+        self._result_cache.move_to_end(cache_key)
+        self._cache_hits += 1
+        self.logger.info("单张发票识别完成（命中缓存）")
+        return copy.deepcopy(result)
+    
+    def _get_cache_stats(self) -> Dict[str, Any]:
+        """返回识别结果缓存统计信息"""
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            "success": True,
+            "data": {
+                "enabled": self.config.processing.enable_cache and self._result_cache_size > 0,
+                "size": len(self._result_cache),
+                "max_size": self._result_cache_size,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": self._cache_hits / lookups if lookups else 0.0
+            }
+        }
+    
+    async def _run_single_recognition(
+        self,
+        image_data: Optional[str],
+        image_url: Optional[str],
+        output_format: str
+    ) -> Dict[str, Any]:
+        """执行单张发票的完整识别流程（解码、预处理、分类、OCR、解析）"""
         # 处理图像数据
         if image_data:
             # 验证Base64数据
@@ -195,11 +323,10 @@ class InvoiceOCRServer:
         # 预处理图像
         processed_image = await self.image_processor.preprocess_image(image)
         
-        # 发票类型识别
-        invoice_type_result = await self.ocr_engine.classify_invoice_type(processed_image)
-        
-        # OCR文本识别
+        # OCR文本识别：流水线只做一次文本检测，并基于检测文本完成发票类型分类，
+        # 无需再单独调用classify_invoice_type对同一图像重复检测
         ocr_result = await self.ocr_engine.full_ocr_pipeline(processed_image)
+        invoice_type_result = ocr_result.get('classification', {})
         
         # 将发票类型信息合并到OCR结果中
         ocr_result['invoice_classification'] = invoice_type_result
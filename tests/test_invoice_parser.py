@@ -43,6 +43,46 @@ class TestInvoiceParser:
         assert "verification" in result
         assert "meta" in result
     
+    @pytest.mark.asyncio
+    async def test_parse_invoice_cache_hit(self, invoice_parser, sample_ocr_result):
+        """测试相同OCR结果重复解析命中缓存且返回独立副本"""
+        first = await invoice_parser.parse_invoice(sample_ocr_result, "standard")
+        first["basic_info"]["invoice_number"] = "modified"
+        
+        second = await invoice_parser.parse_invoice(sample_ocr_result, "standard")
+        
+        assert len(invoice_parser._result_cache) == 1
+        assert second["basic_info"]["invoice_number"] != "modified"
+    
+    @pytest.mark.asyncio
+    async def test_parse_batch(self, invoice_parser, sample_ocr_result):
+        """测试批量解析结果与逐张解析一致"""
+        expected = await invoice_parser.parse_invoice(sample_ocr_result, "standard")
+        
+        try:
+            results = await invoice_parser.parse_batch([sample_ocr_result] * 3, "standard")
+        finally:
+            await invoice_parser.cleanup()
+        
+        assert results == [expected] * 3
+    
+    @pytest.mark.asyncio
+    async def test_parse_batch_free_threaded(self, invoice_parser, sample_ocr_result, monkeypatch):
+        """测试自由线程构建下批量解析使用线程池"""
+        from concurrent.futures import ThreadPoolExecutor
+        from invoice_ocr_mcp.modules import invoice_parser as parser_module
+        
+        monkeypatch.setattr(parser_module, "GIL_DISABLED", True)
+        expected = await invoice_parser.parse_invoice(sample_ocr_result, "standard")
+        
+        try:
+            results = await invoice_parser.parse_batch([sample_ocr_result] * 3, "standard")
+            assert isinstance(invoice_parser._batch_executor, ThreadPoolExecutor)
+        finally:
+            await invoice_parser.cleanup()
+        
+        assert results == [expected] * 3
+    
     @pytest.mark.asyncio
     async def test_parse_invoice_detailed_format(self, invoice_parser, sample_ocr_result):
         """测试详细格式发票解析"""
@@ -73,8 +113,19 @@ class TestInvoiceParser:
         assert result["name"] == "增值税专用发票"
         assert result["confidence"] == 0.95
     
-    @pytest.mark.asyncio
-    async def test_parse_basic_info(self, invoice_parser):
+    def test_parse_invoice_type_longest_name(self, invoice_parser):
+        """测试发票类型解析优先匹配最长的标准名称"""
+        result = invoice_parser._parse_invoice_type({"type": "机动车增值税专用发票"})
+        assert result["code"] == "03"
+        
+        result = invoice_parser._parse_invoice_type({"type": "增值税普通发票（卷式）"})
+        assert result["code"] == "11"
+        
+        result = invoice_parser._parse_invoice_type({"type": "unknown"})
+        assert result["code"] is None
+        assert result["name"] == "未知类型"
+    
+    def test_parse_basic_info(self, invoice_parser):
         """测试基本信息解析"""
         texts = [
             "发票号码: 12345678",
@@ -83,13 +134,38 @@ class TestInvoiceParser:
             "税额: ￥130.00"
         ]
         
-        result = await invoice_parser._parse_basic_info(texts)
+        document_fields = invoice_parser._scan_document_fields(' '.join(texts))
+        result = invoice_parser._parse_basic_info(texts, document_fields)
         
         assert "invoice_number" in result
         assert "invoice_date" in result
         assert "total_amount" in result
         assert "tax_amount" in result
     
+    def test_scan_document_fields(self, invoice_parser):
+        """测试合并文本单次扫描提取日期、校验码和机器编号"""
+        text = "开票日期: 2024年13月01日 2024年1月15日 校验码: 12345678901 机器编号: 499098765432"
+        fields = invoice_parser._scan_document_fields(text)
+        
+        assert fields["invoice_date"] == "2024-01-15"
+        assert fields["check_code"] == "12345678901"
+        assert fields["machine_number"] == "499098765432"
+    
+    def test_scan_document_fields_prefilter(self, invoice_parser):
+        """测试长文本预扫描路径与纯re扫描结果一致"""
+        text = "测试文本 " * 200 + "开票日期: 2024-02-29 机器编号: 499098765432"
+        invoice_parser._hyperscan_min_length = len(text) + 1
+        expected = invoice_parser._scan_document_fields(text)
+        assert expected["invoice_date"] == "2024-02-29"
+        
+        invoice_parser._hyperscan_min_length = 0
+        assert invoice_parser._scan_document_fields(text) == expected
+        assert invoice_parser._scan_document_fields("测试文本 " * 200) == {
+            "invoice_date": None,
+            "check_code": None,
+            "machine_number": None
+        }
+    
     def test_extract_invoice_number(self, invoice_parser):
         """测试发票号码提取"""
         texts = [
@@ -133,6 +209,14 @@ class TestInvoiceParser:
         phone = invoice_parser._extract_phone(text)
         assert phone == "010-12345678"
     
+    def test_extract_address(self, invoice_parser):
+        """测试地址提取按关键词优先级选取文本段"""
+        text = "地址: 朝阳路88号院 北京市海淀区中关村 电话"
+        address = invoice_parser._extract_address(text)
+        assert address == "北京市海淀区中关村"
+        
+        assert invoice_parser._extract_address("地址: 北京市") is None
+    
     def test_calculate_confidence(self, invoice_parser, sample_ocr_result):
         """测试置信度计算"""
         confidence = invoice_parser._calculate_confidence(sample_ocr_result)
@@ -149,7 +233,7 @@ class TestInvoiceParser:
             "购买方: 客户公司"
         ]
         
-        seller_texts = invoice_parser._find_seller_section(texts)
+        seller_texts = invoice_parser._partition_sections(texts)["seller"]
         assert len(seller_texts) >= 2
         assert any("销售方" in text for text in seller_texts)
     
@@ -163,9 +247,22 @@ class TestInvoiceParser:
             "商品名称: 测试商品"
         ]
         
-        buyer_texts = invoice_parser._find_buyer_section(texts)
+        buyer_texts = invoice_parser._partition_sections(texts)["buyer"]
         assert len(buyer_texts) >= 2
         assert any("购买方" in text for text in buyer_texts)
+    
+    def test_partition_items_section(self, invoice_parser):
+        """测试商品明细区域划分"""
+        texts = [
+            "购买方: 客户公司",
+            "商品名称 规格 数量 金额",
+            "办公用品 标准版 1 870.00",
+            "合计 ￥870.00"
+        ]
+        
+        sections = invoice_parser._partition_sections(texts)
+        assert sections["items"] == ["办公用品 标准版 1 870.00"]
+        assert sections["buyer"] == ["购买方: 客户公司"]
 
 
 class TestInvoiceParserEdgeCases:
@@ -0,0 +1,80 @@
+"""
+RapidOCR引擎测试
+"""
+
+import pytest
+import cv2
+import numpy as np
+import sys
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from invoice_ocr_mcp.modules.rapidocr_engine import RapidOCREngine
+
+
+class TestRapidOCREngine:
+    """RapidOCR引擎测试类"""
+    
+    @pytest.fixture
+    def rapidocr_engine(self, test_config):
+        """创建RapidOCR引擎实例（不加载模型）"""
+        return RapidOCREngine(test_config)
+    
+    def test_classify_by_keywords(self, rapidocr_engine):
+        """测试关键词分类"""
+        text = "增值税专用发票 发票号码: 12345678 纳税人识别号 价税合计"
+        invoice_type, confidence, keywords, all_scores = rapidocr_engine._classify_by_keywords(text)
+        
+        assert invoice_type == "vat_invoice"
+        assert confidence == 0.4
+        assert keywords == ["发票号码", "增值税专用发票", "专用发票", "纳税人识别号", "价税合计"]
+        assert all_scores == {"general_invoice": 0.4, "vat_invoice": 1.0}
+    
+    def test_classify_by_keywords_without_automaton(self, rapidocr_engine):
+        """测试未安装pyahocorasick时逐个匹配关键词的结果一致"""
+        text = "火车票 车次 G1234 席别 二等座"
+        expected = rapidocr_engine._classify_by_keywords(text)
+        
+        rapidocr_engine._keyword_automaton = None
+        assert rapidocr_engine._classify_by_keywords(text) == expected
+        assert expected[0] == "train_ticket"
+    
+    def test_classify_by_keywords_no_match(self, rapidocr_engine):
+        """测试无关键词时返回未知类型"""
+        assert rapidocr_engine._classify_by_keywords("无关文本") == ("unknown", 0.0, [], {})
+    
+    def test_classify_from_text(self, rapidocr_engine):
+        """测试基于已检测文本区域分类，无文本时返回未知类型"""
+        regions = [{"text": "增值税专用发票"}, {"text": "价税合计 ￥983.10"}]
+        result = rapidocr_engine._classify_from_text(regions)
+        
+        assert result["type"] == "vat_invoice"
+        assert result["ocr_text"] == "增值税专用发票 价税合计 ￥983.10"
+        assert result["all_scores"]["vat_invoice"] == 1.0
+        assert rapidocr_engine._classify_from_text([])["type"] == "unknown"
+    
+    def test_extract_by_rules(self, rapidocr_engine):
+        """测试规则提取关键信息"""
+        text = "发票代码: 1100231130 发票号码: 12345678 开票日期: 2024年01月15日 价税合计 ￥983.10 销售方名称: 测试科技有限公司"
+        info = rapidocr_engine._extract_by_rules(text)
+        
+        assert info["invoice_code"] == "1100231130"
+        assert info["invoice_number"] == "12345678"
+        assert info["issue_date"] == "2024年01月15日"
+        assert info["total_amount"] == 983.10
+        assert info["seller_name"] == "测试科技有限公司"
+    
+    def test_read_image_file(self, tmp_path):
+        """测试按原分辨率读取图像文件，文件不存在或为空时与cv2.imread一致返回None"""
+        image = np.random.default_rng(0).integers(0, 256, (80, 100, 3), dtype=np.uint8)
+        image_path = str(tmp_path / "page.png")
+        cv2.imwrite(image_path, image)
+        empty_path = tmp_path / "empty.png"
+        empty_path.touch()
+        
+        np.testing.assert_array_equal(RapidOCREngine.preprocess_image(image_path), image)
+        assert RapidOCREngine.preprocess_image(str(tmp_path / "missing.png")) is None
+        assert RapidOCREngine.preprocess_image(str(empty_path)) is None
@@ -168,6 +168,114 @@ class TestInvoiceOCRServer:
         # 可以添加更多具体的工具注册验证
 
 
+class TestResultCache:
+    """识别结果缓存测试"""
+    
+    @pytest.fixture
+    def server(self, test_config):
+        """创建测试服务器实例，识别流程由测试替换"""
+        with patch('invoice_ocr_mcp.modules.ocr_engine.create_ocr_engine'), \
+             patch.object(InvoiceOCRServer, '_register_handlers'), \
+             patch('invoice_ocr_mcp.server.InvoiceParser'), \
+             patch('invoice_ocr_mcp.server.ImageProcessor'), \
+             patch('invoice_ocr_mcp.server.BatchProcessor'):
+            server = InvoiceOCRServer(test_config)
+        server._run_single_recognition = AsyncMock(return_value={
+            "success": True,
+            "data": {"basic_info": {"invoice_number": "12345678"}}
+        })
+        return server
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_requests_hit_cache(self, server, sample_base64_image):
+        """测试重复提交的相同图像只识别一次且返回独立副本"""
+        arguments = {"image_data": sample_base64_image}
+        first = await server._recognize_single_invoice(arguments)
+        first["data"]["basic_info"]["invoice_number"] = "modified"
+        
+        second = await server._recognize_single_invoice(arguments)
+        
+        assert server._run_single_recognition.await_count == 1
+        assert second["data"]["basic_info"]["invoice_number"] == "12345678"
+        
+        stats = server._get_cache_stats()["data"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_coalesced(self, server, sample_base64_image):
+        """测试并发的相同请求只执行一次识别，no_cache时强制重新识别"""
+        arguments = {"image_data": sample_base64_image}
+        results = await asyncio.gather(
+            *(server._recognize_single_invoice(arguments) for _ in range(3))
+        )
+        
+        assert server._run_single_recognition.await_count == 1
+        assert all(result == results[0] for result in results)
+        
+        await server._recognize_single_invoice({**arguments, "no_cache": True})
+        assert server._run_single_recognition.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_failed_result_not_cached(self, server, sample_base64_image):
+        """测试识别失败的结果不写入缓存"""
+        server._run_single_recognition.return_value = {"success": False}
+        arguments = {"image_data": sample_base64_image}
+        
+        await server._recognize_single_invoice(arguments)
+        await server._recognize_single_invoice(arguments)
+        
+        assert server._run_single_recognition.await_count == 2
+        assert len(server._result_cache) == 0
+    
+    @pytest.mark.asyncio
+    async def test_url_requests_not_cached(self, server):
+        """测试URL请求不缓存，同一URL的图像内容变化后重新识别"""
+        arguments = {"image_url": "https://example.com/invoice.jpg"}
+        
+        await server._recognize_single_invoice(arguments)
+        await server._recognize_single_invoice(arguments)
+        
+        assert server._run_single_recognition.await_count == 2
+        assert len(server._result_cache) == 0
+
+
+class TestSingleRecognition:
+    """单张发票识别流程测试"""
+    
+    @pytest.fixture
+    def server(self, test_config):
+        """创建测试服务器实例"""
+        with patch('invoice_ocr_mcp.modules.ocr_engine.create_ocr_engine'), \
+             patch.object(InvoiceOCRServer, '_register_handlers'), \
+             patch('invoice_ocr_mcp.server.InvoiceParser'), \
+             patch('invoice_ocr_mcp.server.ImageProcessor'), \
+             patch('invoice_ocr_mcp.server.BatchProcessor'):
+            return InvoiceOCRServer(test_config)
+    
+    @pytest.mark.asyncio
+    async def test_classification_reuses_ocr_pipeline(self, server):
+        """测试发票类型取自OCR流水线的分类结果，不再单独检测同一图像"""
+        classification = {"type": "vat_invoice", "confidence": 0.4, "detected_keywords": ["价税合计"]}
+        server.image_processor.download_image = AsyncMock()
+        server.image_processor.preprocess_image = AsyncMock()
+        server.ocr_engine.classify_invoice_type = AsyncMock()
+        server.ocr_engine.full_ocr_pipeline = AsyncMock(return_value={
+            "text_regions": [],
+            "classification": classification
+        })
+        server.invoice_parser.parse_invoice = AsyncMock(return_value={"basic_info": {}})
+        
+        result = await server._run_single_recognition(None, "https://example.com/invoice.jpg", "standard")
+        
+        server.ocr_engine.classify_invoice_type.assert_not_awaited()
+        server.ocr_engine.full_ocr_pipeline.assert_awaited_once()
+        assert server.invoice_parser.parse_invoice.await_args.args[0]["invoice_classification"] == classification
+        assert result["data"]["invoice_type"]["raw_type"] == "vat_invoice"
+        assert result["data"]["detected_keywords"] == ["价税合计"]
+
+
 class TestServerIntegration:
     """服务器集成测试"""
     
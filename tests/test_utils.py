@@ -0,0 +1,211 @@
+"""
+工具函数测试
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from invoice_ocr_mcp.modules.utils import (
+    BytesRotatingFileHandler,
+    LocalQueueHandler,
+    StructuredFormatter,
+    async_timing_decorator,
+    calculate_file_hash,
+    format_error_response_bytes,
+    format_success_response_bytes,
+    get_system_info,
+    safe_json_dumps,
+    safe_json_loads,
+    setup_logging,
+    shutdown_logging,
+    timing_decorator,
+)
+
+
+class TestJsonHelpers:
+    """JSON序列化工具测试类"""
+    
+    def test_safe_json_dumps_round_trip(self):
+        """测试序列化结果保留中文并可还原"""
+        data = {"发票号码": "12345678", "amount": 983.1, "items": [1, 2]}
+        text = safe_json_dumps(data)
+        
+        assert "发票号码" in text
+        assert json.loads(text) == data
+        assert json.loads(safe_json_dumps(data, indent=2, sort_keys=True)) == data
+    
+    def test_safe_json_dumps_stdlib_semantics(self):
+        """测试输出与标准库json.dumps保持一致"""
+        assert safe_json_dumps({"a": 1, "b": 2}) == '{"a": 1, "b": 2}'
+        assert safe_json_dumps({"a": float("nan")}) == '{"a": NaN}'
+        assert safe_json_dumps({"big": 2 ** 70}) == json.dumps({"big": 2 ** 70})
+        assert json.loads(safe_json_dumps(object())).startswith("<object object")
+        assert safe_json_dumps({"a": 1}, separators=(",", ":")) == '{"a":1}'
+    
+    def test_safe_json_loads(self):
+        """测试反序列化及失败时返回默认值"""
+        assert safe_json_loads('{"a": [1, 2]}') == {"a": [1, 2]}
+        assert safe_json_loads(b'{"a": 1}') == {"a": 1}
+        assert math.isnan(safe_json_loads('{"a": NaN}')["a"])
+        assert safe_json_loads(str(2 ** 70)) == 2 ** 70
+        assert safe_json_loads("not json", default={}) == {}
+        assert safe_json_loads(None) is None
+    
+    def test_format_response_bytes(self):
+        """测试响应直接序列化为JSON字节串"""
+        error = json.loads(format_error_response_bytes("INVALID_INPUT", "图像数据无效", {"index": 1}))
+        assert error["success"] is False
+        assert error["error"]["code"] == "INVALID_INPUT"
+        assert error["error"]["details"] == {"index": 1}
+        
+        success = json.loads(format_success_response_bytes({"path": Path("a.jpg"), 1: "一"}))
+        assert success["data"] == {"path": "a.jpg", "1": "一"}
+        assert success["message"] == "操作成功"
+    
+    def test_structured_formatter(self):
+        """测试结构化日志输出为单行JSON并包含额外字段"""
+        record = logging.LogRecord("invoice_ocr_mcp", logging.INFO, __file__, 10, "识别完成", None, None)
+        record.request_id = "req-1"
+        
+        log_data = json.loads(StructuredFormatter().format(record))
+        
+        assert log_data["message"] == "识别完成"
+        assert log_data["level"] == "INFO"
+        assert log_data["request_id"] == "req-1"
+    
+    def test_bytes_rotating_file_handler(self, tmp_path):
+        """测试结构化日志以字节写入文件并按大小滚动"""
+        log_file = tmp_path / "server.log"
+        handler = BytesRotatingFileHandler(log_file, maxBytes=400, backupCount=2, encoding='utf-8')
+        handler.setFormatter(StructuredFormatter())
+        
+        try:
+            for i in range(5):
+                record = logging.LogRecord("invoice_ocr_mcp", logging.INFO, __file__, 10, f"第{i}张发票", None, None)
+                handler.handle(record)
+        finally:
+            handler.close()
+        
+        lines = log_file.read_bytes().splitlines()
+        assert json.loads(lines[-1])["message"] == "第4张发票"
+        assert (tmp_path / "server.log.1").exists()
+    
+    def test_bytes_rotating_file_handler_emit_batch(self, tmp_path):
+        """测试批量写入与逐条写入的滚动结果一致且不丢记录"""
+        records = [
+            logging.LogRecord("invoice_ocr_mcp", logging.INFO, __file__, 10, f"第{i}张发票", None, None)
+            for i in range(10)
+        ]
+        handler = BytesRotatingFileHandler(tmp_path / "server.log", maxBytes=600, backupCount=5)
+        handler.setFormatter(StructuredFormatter())
+        
+        try:
+            handler.emit_batch(records)
+        finally:
+            handler.close()
+        
+        messages = []
+        for log_file in sorted(tmp_path.iterdir(), reverse=True):
+            messages.extend(json.loads(line)["message"] for line in log_file.read_bytes().splitlines())
+        assert messages == [f"第{i}张发票" for i in range(10)]
+        assert all(log_file.stat().st_size < 600 for log_file in tmp_path.iterdir())
+
+
+class TestFileHash:
+    """文件哈希测试类"""
+    
+    def test_calculate_file_hash(self, tmp_path):
+        """测试哈希结果正确，文件修改后不会命中旧缓存"""
+        file_path = tmp_path / "invoice.pdf"
+        file_path.write_bytes(b"invoice-v1")
+        
+        assert calculate_file_hash(file_path) == hashlib.md5(b"invoice-v1").hexdigest()
+        assert calculate_file_hash(str(file_path), 'sha256') == hashlib.sha256(b"invoice-v1").hexdigest()
+        
+        stat = file_path.stat()
+        file_path.write_bytes(b"invoice-v2")
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert calculate_file_hash(file_path) == hashlib.md5(b"invoice-v2").hexdigest()
+        
+        empty_path = tmp_path / "empty.pdf"
+        empty_path.write_bytes(b"")
+        assert calculate_file_hash(empty_path) == hashlib.md5(b"").hexdigest()
+
+
+class TestSystemInfo:
+    """系统信息测试类"""
+    
+    def test_get_system_info(self):
+        """测试系统信息包含静态字段，且返回的字典可安全修改"""
+        info = get_system_info()
+        assert info["cpu_count"] == os.cpu_count()
+        assert "python_version" in info
+        
+        info["cpu_count"] = -1
+        assert get_system_info()["cpu_count"] == os.cpu_count()
+
+
+class TestTimingDecorator:
+    """计时装饰器测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_timing_decorators(self, caplog):
+        """测试计时装饰器透传结果与异常，仅在DEBUG级别记录耗时"""
+        logger = logging.getLogger("test_timing")
+        
+        @timing_decorator(logger)
+        def parse(value):
+            if value is None:
+                raise ValueError("空值")
+            return value * 2
+        
+        @async_timing_decorator(logger)
+        async def recognize(value):
+            return value + 1
+        
+        with caplog.at_level(logging.INFO, logger="test_timing"):
+            assert parse(2) == 4
+            assert await recognize(1) == 2
+            with pytest.raises(ValueError):
+                parse(None)
+        assert [record.levelname for record in caplog.records] == ["ERROR"]
+        
+        caplog.clear()
+        with caplog.at_level(logging.DEBUG, logger="test_timing"):
+            assert await recognize(2) == 3
+        assert "recognize 执行时间" in caplog.records[0].getMessage()
+
+
+class TestLogging:
+    """日志系统测试类"""
+    
+    def test_setup_logging_queue(self, tmp_path):
+        """测试日志经队列由后台线程写入文件，关闭时写完剩余记录"""
+        config = SimpleNamespace(logging=SimpleNamespace(log_dir=str(tmp_path), format='structured'))
+        logger = setup_logging(config)
+        
+        try:
+            assert [type(handler) for handler in logger.handlers] == [LocalQueueHandler]
+            try:
+                raise ValueError("坏数据")
+            except ValueError:
+                logger.exception("解析%s失败", "发票")
+        finally:
+            shutdown_logging()
+        
+        error_lines = (tmp_path / "error.log").read_bytes().splitlines()
+        log_data = json.loads(error_lines[-1])
+        assert log_data["message"] == "解析发票失败"
+        assert "ValueError: 坏数据" in log_data["exception"]
+        assert len((tmp_path / "server.log").read_bytes().splitlines()) == 2
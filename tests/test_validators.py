@@ -0,0 +1,101 @@
+"""
+验证器测试
+"""
+
+import base64
+import sys
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from invoice_ocr_mcp.modules.validators import (
+    sanitize_text,
+    validate_amount,
+    validate_batch_input,
+    validate_date_string,
+    validate_image_data,
+    validate_phone_number,
+    validate_tax_id,
+)
+
+
+class TestValidators:
+    """验证器测试类"""
+    
+    def test_validate_image_data(self):
+        """测试按文件头和大小验证Base64图像数据"""
+        png_data = base64.b64encode(b'\x89PNG\r\n\x1a\n' + b'\x00' * 2000).decode()
+        webp_data = base64.b64encode(b'RIFF\x00\x00\x00\x00WEBP' + b'\x00' * 2000).decode()
+        
+        assert validate_image_data(png_data)
+        assert validate_image_data("data:image/png;base64," + png_data)
+        assert validate_image_data(webp_data)
+        assert not validate_image_data(base64.b64encode(b'\x89PNG\r\n\x1a\n' + b'\x00' * 100).decode())
+        assert not validate_image_data(base64.b64encode(b'%PDF-1.4' + b'\x00' * 2000).decode())
+        assert not validate_image_data("data:image/png;base64")
+        assert not validate_image_data(png_data + "*")
+        assert not validate_image_data(png_data[:100] + "é" + png_data[100:])
+        assert validate_image_data(png_data + "\n")
+        assert not validate_image_data(png_data + "\n\n")
+    
+    def test_validate_image_data_padding(self):
+        """测试填充不完整的Base64数据与完整解码的判断一致"""
+        encoded = base64.b64encode(b'\xFF\xD8\xFF' + b'\x00' * 2000).decode()
+        assert encoded.endswith("=")
+        
+        assert not validate_image_data(encoded.rstrip("="))
+        assert not validate_image_data(encoded[:-1] + "AA")
+        assert validate_image_data(encoded.rstrip("=")[:-3])
+    
+    def test_validate_fields(self):
+        """测试税号、电话号码和日期格式验证"""
+        assert validate_tax_id("91110000123456789X")
+        assert validate_tax_id("110101123456789")
+        assert not validate_tax_id("91110000123456789I")
+        
+        assert validate_phone_number("138-0013-8000")
+        assert validate_phone_number("(010) 12345678")
+        assert not validate_phone_number("12345")
+        
+        assert validate_date_string("2024-01-15")
+        assert validate_date_string("2024年1月5日")
+        assert not validate_date_string("2024-1-15")
+    
+    def test_validate_amount(self):
+        """测试金额格式验证：非负、最多2位小数，拒绝科学计数法和inf/nan"""
+        assert validate_amount("￥1,234.56")
+        assert validate_amount(" 983.1 ")
+        assert validate_amount("100.")
+        assert not validate_amount("12.345")
+        assert not validate_amount("-5")
+        assert not validate_amount("1e5")
+        assert not validate_amount("nan")
+        assert not validate_amount("无效金额")
+    
+    def test_sanitize_text(self):
+        """测试移除控制字符、合并空白并限制长度"""
+        assert sanitize_text("  发票\x00号码\t\n 12345678\x7f  ") == "发票号码 12345678"
+        assert sanitize_text("a  b" * 10, max_length=5) == "a ba "
+        assert sanitize_text(None) == ""
+    
+    def test_validate_batch_input(self):
+        """测试批量输入验证汇总全部无效项，fail_fast时遇到首个无效项即返回"""
+        images = [
+            {"id": "1", "image_url": "https://example.com/invoice.jpg"},
+            "not a dict",
+            {"id": "", "image_url": "ftp://example.com/invoice.jpg"},
+        ]
+        
+        result = validate_batch_input(images)
+        assert not result["valid"]
+        assert result["details"]["valid_count"] == 1
+        assert [item["index"] for item in result["details"]["invalid_items"]] == [1, 2]
+        assert result["details"]["invalid_items"][1]["errors"] == ["id字段必须是非空字符串", "image_url格式无效"]
+        
+        result = validate_batch_input(images, fail_fast=True)
+        assert result["error"] == "发现1个无效项"
+        assert [item["index"] for item in result["details"]["invalid_items"]] == [1]
+        
+        assert validate_batch_input(images[:1])["valid"]